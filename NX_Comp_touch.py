@@ -1,7 +1,28 @@
 ﻿import NXOpen
-import NXOpen.Assemblies
-import NXOpen.GeometricAnalysis
+import contextlib
+import json
 import os
+import sys
+import time
+from array import array
+
+# Clearance mode: set to a distance (mm) to report every body pair closer than
+# this value together with its minimum distance, instead of touching/not touching
+clearance = None
+
+# Budget mode: stop the sweep after this many seconds, checking the pairs most
+# likely to touch first (touching in the previous run, then largest bounding box
+# overlap). Pairs left unchecked are saved in the state file next to the part.
+time_budget = None
+# Only check the pairs left unchecked by the previous budget run
+resume = False
+
+# Screening file written by mesh_interference.py: pairs labelled apart or
+# interfering there are reported as such, only ambiguous pairs are checked in NX
+screening_file = None
+
+# SQLite file of results_store.py: every run is also stored there when set
+results_db = None
 
 def main():
     theSession = NXOpen.Session.GetSession()
@@ -22,37 +43,64 @@ def main():
         return
     
     lw.WriteLine(f"\nFound {len(components)} components in assembly\n")
+
+    if clearance is not None:
+        return run_clearance_analysis(theSession, workPart, lw, components, clearance)
+
+    # Names are resolved lazily, once per component and body, and looked up by index
+    comp_names = NameIndex(components, get_component_name)
+    comp_keys = NameIndex(components, get_component_key)
+    comp_bodies = [get_component_bodies(comp) for comp in components]
+    body_names = [NameIndex(bodies, get_body_name) for bodies in comp_bodies]
     
     # Store results
-    interference_results = []
+    interference_results = PairTable()
     
-    # Check interference between all component pairs
-    total_checks = (len(components) * (len(components) - 1)) // 2
-    check_count = 0
+    # All component pairs, or the ones the previous budget run did not reach
+    pairs = [(i, j) for i in range(len(components)) for j in range(i + 1, len(components))]
+    previous_state = read_state_file(workPart)
     
-    for i in range(len(components)):
-        for j in range(i + 1, len(components)):
-            check_count += 1
-            comp1 = components[i]
-            comp2 = components[j]
-            
-            comp1_name = get_component_name(comp1)
-            comp2_name = get_component_name(comp2)
-            
-            lw.WriteLine(f"Checking ({check_count}/{total_checks}): {comp1_name} vs {comp2_name}")
-            
+    if resume and previous_state is not None:
+        unchecked_keys = set(pair_key(*pair) for pair in previous_state['unchecked'])
+        pairs = [(i, j) for i, j in pairs if pair_key(comp_keys[i], comp_keys[j]) in unchecked_keys]
+        # Results of the previous runs stay in the report and the state file
+        merged_count = merge_previous_results(interference_results, previous_state, comp_keys)
+        lw.WriteLine(f"Resuming: {len(pairs)} pair(s) left unchecked by the previous run, "
+                     f"{merged_count} earlier result(s) kept\n")
+    
+    if screening_file is not None:
+        decided_count = len(interference_results)
+        pairs = apply_screening(pairs, comp_keys, read_screening_file(screening_file), interference_results)
+        lw.WriteLine(f"Screening: {len(interference_results) - decided_count} pair(s) decided offline, "
+                     f"{len(pairs)} left for the exact check\n")
+    
+    deadline = None
+    if time_budget is not None:
+        deadline = time.perf_counter() + time_budget
+        pairs, apart_pairs = prioritize_pairs(components, comp_bodies, comp_keys, pairs, previous_state)
+        lw.WriteLine(f"Budget mode: {time_budget} s, {len(apart_pairs)} pair(s) skipped with bounding boxes apart\n")
+        
+        for i, j in apart_pairs:
+            interference_results.append(i, j, False, "Bounding boxes apart", method=PairTable.BOXES_APART)
+    
+    # Check interference between the component pairs
+    total_checks = len(pairs)
+    unchecked_pairs = []
+    
+    with bulk_mode(theSession, lw, "Interference Sweep"):
+        for check_count, (i, j) in enumerate(pairs, 1):
+            if deadline is not None and time.perf_counter() > deadline:
+                unchecked_pairs = pairs[check_count - 1:]
+                lw.WriteLine(f"Time budget exhausted: {len(unchecked_pairs)} pair(s) left unchecked\n")
+                break
+        
+            lw.WriteLine(f"Checking ({check_count}/{total_checks}): {comp_names[i]} vs {comp_names[j]}")
+        
             # Check if components are touching
-            is_touching, details = check_component_interference(theSession, workPart, comp1, comp2)
-            
-            result = {
-                'component1': comp1_name,
-                'component2': comp2_name,
-                'touching': is_touching,
-                'details': details
-            }
-            
-            interference_results.append(result)
-            
+            is_touching, details, body_pairs = check_component_interference(theSession, workPart, comp_bodies[i], comp_bodies[j])
+        
+            interference_results.append(i, j, is_touching, details, body_pairs)
+        
             if is_touching:
                 lw.WriteLine(f"  >> TOUCHING: {details}")
             else:
@@ -60,12 +108,198 @@ def main():
             lw.WriteLine("")
     
     # Print summary
-    print_summary(lw, interference_results)
+    print_summary(lw, interference_results, comp_names, body_names, unchecked_pairs)
     
     # Write results to file
-    write_results_to_file(workPart, interference_results)
+    output_path = write_results_to_file(workPart, interference_results, comp_names, body_names, unchecked_pairs)
+    write_state_file(workPart, interference_results, comp_keys, unchecked_pairs, previous_state)
+    
+    if results_db is not None:
+        store_results(workPart, 'touch', [
+            (comp_keys[i], comp_keys[j], comp_names[i], comp_names[j], int(interference_results.is_touching(row)),
+             None, interference_results.detail(row))
+            for row, (i, j) in enumerate(zip(interference_results.index1, interference_results.index2))])
     
     lw.WriteLine("\nAnalysis complete!")
+    return output_path
+
+@contextlib.contextmanager
+def bulk_mode(theSession, lw, label):
+    """
+    Run a batch of NX operations with display updates suppressed and interpart
+    updates delayed, grouped under one visible undo mark. The previous state is
+    restored on exit or exception and the time spent inside is reported.
+    """
+    import NXOpen.UF
+    theUfSession = NXOpen.UF.UFSession.GetUFSession()
+    start = time.perf_counter()
+    markId = theSession.SetUndoMark(NXOpen.Session.MarkVisibility.Visible, label)
+    
+    display_state = None
+    try:
+        display_state = theUfSession.Disp.AskDisplay()
+        theUfSession.Disp.SetDisplay(NXOpen.UF.UFConstants.UF_DISP_SUPPRESS_DISPLAY)
+    except:
+        display_state = None
+    
+    interpart_delay = None
+    try:
+        interpart_delay = theSession.UpdateManager.InterpartDelay
+        theSession.UpdateManager.InterpartDelay = True
+    except:
+        interpart_delay = None
+    
+    try:
+        yield markId
+    finally:
+        if interpart_delay is not None:
+            try:
+                theSession.UpdateManager.InterpartDelay = interpart_delay
+            except:
+                pass
+        
+        if display_state is not None:
+            try:
+                theUfSession.Disp.SetDisplay(display_state)
+                if display_state == NXOpen.UF.UFConstants.UF_DISP_UNSUPPRESS_DISPLAY:
+                    theUfSession.Disp.RegenerateDisplay()
+            except:
+                pass
+        
+        # Collapse the marks of the batch into the single visible one
+        try:
+            theSession.DeleteUndoMarksUpToMark(markId, None, False)
+        except:
+            pass
+        
+        lw.WriteLine(f"{label}: {time.perf_counter() - start:.2f} s in bulk mode\n")
+
+class PairTable:
+    """
+    Component pair results in parallel arrays, one row per pair: component
+    indices, a status byte, a byte for how the pair was decided and the id of an
+    interned details string. Touching body pairs are stored flat, row k owning
+    body_offsets[k]:body_offsets[k + 1].
+    """
+    __slots__ = ('index1', 'index2', 'status', 'method', 'detail_ids', 'details', '_detail_ids',
+                 'body1', 'body2', 'body_offsets')
+
+    NOT_TOUCHING = 0
+    TOUCHING = 1
+
+    # How a pair was decided
+    EXACT = 0
+    BOXES_APART = 1
+    SCREENED = 2
+
+    def __init__(self):
+        self.index1 = array('I')
+        self.index2 = array('I')
+        self.status = array('B')
+        self.method = array('B')
+        self.detail_ids = array('I')
+        self.details = []
+        self._detail_ids = {}
+        self.body1 = array('I')
+        self.body2 = array('I')
+        self.body_offsets = array('I', [0])
+
+    def __len__(self):
+        return len(self.status)
+
+    def append(self, i, j, touching, details, body_pairs=(), method=EXACT):
+        """Add the result of component pair (i, j)"""
+        detail_id = self._detail_ids.get(details)
+        if detail_id is None:
+            detail_id = self._detail_ids[details] = len(self.details)
+            self.details.append(details)
+        
+        self.index1.append(i)
+        self.index2.append(j)
+        self.status.append(self.TOUCHING if touching else self.NOT_TOUCHING)
+        self.method.append(method)
+        self.detail_ids.append(detail_id)
+        for index1, index2 in body_pairs:
+            self.body1.append(index1)
+            self.body2.append(index2)
+        self.body_offsets.append(len(self.body1))
+
+    def is_touching(self, row):
+        return self.status[row] == self.TOUCHING
+
+    def detail(self, row):
+        return self.details[self.detail_ids[row]]
+
+    def body_pairs(self, row):
+        """(index1, index2) body indices of the touching bodies of a row"""
+        start, end = self.body_offsets[row], self.body_offsets[row + 1]
+        return zip(self.body1[start:end], self.body2[start:end])
+
+    def touching_rows(self):
+        return [row for row, status in enumerate(self.status) if status == self.TOUCHING]
+
+    def touching_count(self):
+        return self.status.count(self.TOUCHING)
+
+    def method_count(self, method):
+        return self.method.count(method)
+
+class ClearanceTable:
+    """
+    Body pairs within the clearance in parallel arrays: component and body
+    indices and the minimum distance. Rows are read in the order of `order`,
+    a permutation sorted by distance.
+    """
+    __slots__ = ('index1', 'index2', 'body1', 'body2', 'distance', 'order')
+
+    def __init__(self):
+        self.index1 = array('I')
+        self.index2 = array('I')
+        self.body1 = array('I')
+        self.body2 = array('I')
+        self.distance = array('d')
+        self.order = array('I')
+
+    def __len__(self):
+        return len(self.distance)
+
+    def append(self, i, j, index1, index2, distance):
+        """Add body index1 of component i and body index2 of component j at distance"""
+        self.order.append(len(self.distance))
+        self.index1.append(i)
+        self.index2.append(j)
+        self.body1.append(index1)
+        self.body2.append(index2)
+        self.distance.append(distance)
+
+    def sort_by_distance(self):
+        self.order = array('I', sorted(range(len(self.distance)), key=self.distance.__getitem__))
+
+    def rows(self):
+        """Row indices in report order"""
+        return self.order
+
+class NameIndex:
+    """
+    Names of a list of NX objects, resolved on first access and cached by index,
+    so each name crosses the .NET boundary only once.
+    """
+    __slots__ = ('_objects', '_names', '_resolve')
+
+    def __init__(self, objects, resolve):
+        self._objects = objects
+        self._names = [None] * len(objects)
+        self._resolve = resolve
+
+    def __len__(self):
+        return len(self._names)
+
+    def __getitem__(self, index):
+        name = self._names[index]
+        if name is None:
+            name = self._resolve(self._objects[index])
+            self._names[index] = name
+        return name
 
 def get_component_name(component):
     """Get the display name of a component"""
@@ -81,6 +315,20 @@ def get_component_name(component):
     except:
         return "Unknown Component"
 
+def get_component_key(component):
+    """Identifier of a component that stays the same between runs"""
+    try:
+        return component.JournalIdentifier
+    except:
+        return get_component_name(component)
+
+def get_body_name(body):
+    """Get the name of a body"""
+    try:
+        return body.Name if hasattr(body, 'Name') else str(body)
+    except:
+        return "Unknown Body"
+
 def get_all_components(workPart):
     """Get all components in the assembly"""
     components = []
@@ -120,22 +368,20 @@ def get_component_bodies(component):
     
     return bodies
 
-def check_component_interference(theSession, workPart, comp1, comp2):
+def check_component_interference(theSession, workPart, bodies1, bodies2):
     """
-    Check if any solid body from comp1 touches any solid body from comp2
-    Returns: (is_touching: bool, details: str)
+    Check if any solid body of the first component touches any solid body of the second
+    Returns: (is_touching: bool, details: str, touching_pairs: list of (index1, index2) body indices)
     """
-    bodies1 = get_component_bodies(comp1)
-    bodies2 = get_component_bodies(comp2)
-    
     if not bodies1 or not bodies2:
-        return False, "One or both components have no solid bodies"
+        return False, "One or both components have no solid bodies", []
     
+    import NXOpen.GeometricAnalysis
     touching_pairs = []
     
     # Check each body pair
-    for body1 in bodies1:
-        for body2 in bodies2:
+    for index1, body1 in enumerate(bodies1):
+        for index2, body2 in enumerate(bodies2):
             try:
                 markId = theSession.SetUndoMark(NXOpen.Session.MarkVisibility.Invisible, "Interference Check")
                 
@@ -158,9 +404,7 @@ def check_component_interference(theSession, workPart, comp1, comp2):
                 theSession.DeleteUndoMark(markId, None)
                 
                 if str(result) == str(1):
-                    body1_name = body1.Name if hasattr(body1, 'Name') else str(body1)
-                    body2_name = body2.Name if hasattr(body2, 'Name') else str(body2)
-                    touching_pairs.append(f"{body1_name} <-> {body2_name}")
+                    touching_pairs.append((index1, index2))
             
             except Exception as e:
                 # Clean up on error
@@ -172,34 +416,273 @@ def check_component_interference(theSession, workPart, comp1, comp2):
     
     if touching_pairs:
         details = f"Found {len(touching_pairs)} touching body pair(s)"
-        return True, details
+        return True, details, touching_pairs
     else:
-        return False, "No interference detected"
+        return False, "No interference detected", touching_pairs
+
+def get_body_bounding_box(theUfSession, body):
+    """Get the bounding box [xmin, ymin, zmin, xmax, ymax, zmax] of a body"""
+    return list(theUfSession.Modeling.AskBoundingBox(body.Tag))
+
+def get_occurrence_body_boxes(theUfSession, component, bodies, offset=0.0):
+    """
+    Occurrence of each prototype body in the assembly together with its bounding
+    box grown by offset. Returns list of (occurrence_body, box).
+    """
+    body_boxes = []
+    for body in bodies:
+        try:
+            occ_body = component.FindOccurrence(body)
+            if occ_body is None:
+                occ_body = body
+            box = inflate_box(get_body_bounding_box(theUfSession, occ_body), offset)
+            body_boxes.append((occ_body, box))
+        except:
+            continue
+    return body_boxes
+
+def inflate_box(box, offset):
+    """Grow a bounding box by offset on every side"""
+    return [box[0] - offset, box[1] - offset, box[2] - offset,
+            box[3] + offset, box[4] + offset, box[5] + offset]
+
+def merge_boxes(boxes):
+    """Smallest bounding box enclosing all given boxes"""
+    return [min(b[0] for b in boxes), min(b[1] for b in boxes), min(b[2] for b in boxes),
+            max(b[3] for b in boxes), max(b[4] for b in boxes), max(b[5] for b in boxes)]
+
+def overlap_volume(box1, box2):
+    """Volume of the intersection of two bounding boxes, 0 if they are apart"""
+    volume = 1.0
+    for axis in range(3):
+        extent = min(box1[axis + 3], box2[axis + 3]) - max(box1[axis], box2[axis])
+        if extent < 0:
+            return 0.0
+        volume *= extent
+    return volume
+
+def boxes_overlap(box1, box2):
+    """True if two bounding boxes overlap or touch"""
+    return (box1[0] <= box2[3] and box2[0] <= box1[3] and
+            box1[1] <= box2[4] and box2[1] <= box1[4] and
+            box1[2] <= box2[5] and box2[2] <= box1[5])
+
+def find_overlapping_boxes(boxes):
+    """
+    Sweep and prune along X: boxes are visited in order of xmin and only compared
+    with boxes whose X range is still open. Entries that are None are skipped.
+    Returns sorted list of (i, j) index pairs (i < j) whose boxes overlap.
+    """
+    order = sorted((k for k in range(len(boxes)) if boxes[k] is not None), key=lambda k: boxes[k][0])
+    active = []
+    pairs = []
+
+    for k in order:
+        box = boxes[k]
+        active = [a for a in active if boxes[a][3] >= box[0]]
+        for a in active:
+            if boxes_overlap(boxes[a], box):
+                pairs.append((min(a, k), max(a, k)))
+        active.append(k)
+
+    pairs.sort()
+    return pairs
+
+def prioritize_pairs(components, comp_bodies, comp_keys, pairs, previous_state, tolerance=0.01):
+    """
+    Order component pairs by likelihood of contact: pairs touching in the previous
+    run first, then by decreasing bounding box overlap volume.
+    Returns (ordered_pairs, apart_pairs) where apart_pairs have disjoint boxes
+    (grown by tolerance) and cannot touch.
+    """
+    import NXOpen.UF
+    theUfSession = NXOpen.UF.UFSession.GetUFSession()
+
+    comp_boxes = []
+    for comp, bodies in zip(components, comp_bodies):
+        body_boxes = get_occurrence_body_boxes(theUfSession, comp, bodies, tolerance)
+        comp_boxes.append(merge_boxes([box for _, box in body_boxes]) if body_boxes else None)
+
+    previously_touching = set()
+    if previous_state is not None:
+        previously_touching = set(pair_key(*pair) for pair in previous_state['touching'])
+
+    scored_pairs = []
+    apart_pairs = []
 
-def print_summary(lw, results):
+    for i, j in pairs:
+        was_touching = pair_key(comp_keys[i], comp_keys[j]) in previously_touching
+        if comp_boxes[i] is None or comp_boxes[j] is None:
+            # No box to judge by, check it after the overlapping pairs
+            scored_pairs.append((was_touching, -1.0, i, j))
+        elif boxes_overlap(comp_boxes[i], comp_boxes[j]):
+            scored_pairs.append((was_touching, overlap_volume(comp_boxes[i], comp_boxes[j]), i, j))
+        elif was_touching:
+            scored_pairs.append((was_touching, 0.0, i, j))
+        else:
+            apart_pairs.append((i, j))
+
+    scored_pairs.sort(key=lambda s: (not s[0], -s[1]))
+    return [(i, j) for _, _, i, j in scored_pairs], apart_pairs
+
+def measure_minimum_distance(theSession, workPart, unit_mm, body1, body2):
+    """Minimum distance (mm) between two bodies, None if the measurement fails"""
+    try:
+        markId = theSession.SetUndoMark(NXOpen.Session.MarkVisibility.Invisible, "Clearance Check")
+        measureDistance = workPart.MeasureManager.NewDistance(
+            unit_mm, NXOpen.MeasureManager.MeasureType.Minimum, body1, body2)
+        distance = measureDistance.Value
+        measureDistance.Dispose()
+        theSession.DeleteUndoMark(markId, None)
+        return distance
+    except:
+        return None
+
+def run_clearance_analysis(theSession, workPart, lw, components, clearance):
+    """
+    Report every body pair closer than the clearance value (mm).
+    Bounding boxes inflated by half the clearance prune the component and body
+    pairs, the minimum distance is only measured for the pairs that survive.
+    """
+    import NXOpen.UF
+    theUfSession = NXOpen.UF.UFSession.GetUFSession()
+    unit_mm = workPart.UnitCollection.FindObject("MilliMeter")
+    half_clearance = clearance / 2.0
+
+    lw.WriteLine(f"Clearance mode: reporting body pairs closer than {clearance} mm\n")
+
+    # Occurrence bodies and inflated boxes, computed once per component
+    comp_names = NameIndex(components, get_component_name)
+    comp_bodies = []
+    comp_boxes = []
+
+    for comp in components:
+        bodies = get_occurrence_body_boxes(theUfSession, comp, get_component_bodies(comp), half_clearance)
+        comp_bodies.append(bodies)
+        comp_boxes.append(merge_boxes([box for _, box in bodies]) if bodies else None)
+
+    body_names = [NameIndex([body for body, _ in bodies], get_body_name) for bodies in comp_bodies]
+
+    candidate_pairs = find_overlapping_boxes(comp_boxes)
+    total_pairs = (len(components) * (len(components) - 1)) // 2
+    lw.WriteLine(f"Component pairs within clearance boxes: {len(candidate_pairs)} of {total_pairs}\n")
+
+    clearance_results = ClearanceTable()
+    measured_count = 0
+
+    with bulk_mode(theSession, lw, "Clearance Sweep"):
+        for i, j in candidate_pairs:
+            for index1, (body1, box1) in enumerate(comp_bodies[i]):
+                for index2, (body2, box2) in enumerate(comp_bodies[j]):
+                    if not boxes_overlap(box1, box2):
+                        continue
+
+                    measured_count += 1
+                    distance = measure_minimum_distance(theSession, workPart, unit_mm, body1, body2)
+
+                    if distance is not None and distance <= clearance:
+                        clearance_results.append(i, j, index1, index2, distance)
+
+    clearance_results.sort_by_distance()
+
+    lw.WriteLine(f"Minimum distance measured for {measured_count} body pair(s)")
+    print_clearance_summary(lw, clearance_results, clearance, comp_names, body_names)
+    output_path = write_clearance_results_to_file(workPart, clearance_results, clearance, comp_names, body_names)
+
+    if results_db is not None:
+        comp_keys = NameIndex(components, get_component_key)
+        rows = []
+        for row in clearance_results.rows():
+            i, j = clearance_results.index1[row], clearance_results.index2[row]
+            rows.append((comp_keys[i], comp_keys[j], comp_names[i], comp_names[j], None,
+                         clearance_results.distance[row],
+                         f"{body_names[i][clearance_results.body1[row]]} <-> {body_names[j][clearance_results.body2[row]]}"))
+        store_results(workPart, 'clearance', rows, {'clearance': clearance})
+
+    lw.WriteLine("\nAnalysis complete!")
+    return output_path
+
+def format_body_pair(results, row, comp_names, body_names, separator):
+    """Component/body names of both sides of a clearance result row"""
+    i, j = results.index1[row], results.index2[row]
+    return (f"{comp_names[i]}{separator}{body_names[i][results.body1[row]]}{separator}"
+            f"{comp_names[j]}{separator}{body_names[j][results.body2[row]]}")
+
+def print_clearance_summary(lw, results, clearance, comp_names, body_names):
+    """Print clearance results, closest pairs first"""
+    lw.WriteLine("\n" + "="*80)
+    lw.WriteLine(f"BODY PAIRS CLOSER THAN {clearance} mm")
+    lw.WriteLine("="*80)
+
+    lw.WriteLine(f"\nPairs within clearance: {len(results)}")
+
+    for row in results.rows():
+        lw.WriteLine(f"  {results.distance[row]:.4f} mm  {format_body_pair(results, row, comp_names, body_names, ' / ')}")
+
+def write_clearance_results_to_file(workPart, results, clearance, comp_names, body_names):
+    """Write clearance results to a tab separated text file, sorted by distance"""
+    try:
+        part_path = workPart.FullPath
+        part_dir = os.path.dirname(part_path)
+        part_name = os.path.splitext(os.path.basename(part_path))[0]
+
+        output_filename = f"{part_name}_clearance_results.txt"
+        output_path = os.path.join(part_dir, output_filename)
+    except:
+        import tempfile
+        output_path = os.path.join(tempfile.gettempdir(), "clearance_results.txt")
+
+    with open(output_path, 'w') as f:
+        f.write(f"# Clearance: {clearance} mm\n")
+        f.write("#Distance\tComponent1\tBody1\tComponent2\tBody2\n")
+
+        separator = "\t"
+        for row in results.rows():
+            f.write(f"{results.distance[row]:.6f}{separator}{format_body_pair(results, row, comp_names, body_names, separator)}\n")
+
+    lw = NXOpen.Session.GetSession().ListingWindow
+    lw.WriteLine(f"\nResults written to: {output_path}")
+    return output_path
+
+def print_summary(lw, results, comp_names, body_names, unchecked_pairs=()):
     """Print summary of results"""
     lw.WriteLine("\n" + "="*80)
     lw.WriteLine("SUMMARY OF RESULTS")
     lw.WriteLine("="*80)
     
-    touching_count = sum(1 for r in results if r['touching'])
+    touching_count = results.touching_count()
     total_count = len(results)
     
-    lw.WriteLine(f"\nTotal component pairs checked: {total_count}")
+    lw.WriteLine(f"\nTotal component pairs decided: {total_count}")
+    lw.WriteLine(f"  Checked exactly in NX: {results.method_count(PairTable.EXACT)}")
+    lw.WriteLine(f"  Decided by offline screening: {results.method_count(PairTable.SCREENED)}")
+    lw.WriteLine(f"  Skipped, bounding boxes apart: {results.method_count(PairTable.BOXES_APART)}")
     lw.WriteLine(f"Touching pairs: {touching_count}")
     lw.WriteLine(f"Non-touching pairs: {total_count - touching_count}")
+    if unchecked_pairs:
+        lw.WriteLine(f"Unchecked pairs: {len(unchecked_pairs)}")
     
     if touching_count > 0:
         lw.WriteLine("\n" + "-"*80)
         lw.WriteLine("TOUCHING COMPONENTS:")
         lw.WriteLine("-"*80)
         
-        for result in results:
-            if result['touching']:
-                lw.WriteLine(f"  {result['component1']} <-> {result['component2']}")
-                lw.WriteLine(f"    Details: {result['details']}")
+        for row in results.touching_rows():
+            i, j = results.index1[row], results.index2[row]
+            lw.WriteLine(f"  {comp_names[i]} <-> {comp_names[j]}")
+            lw.WriteLine(f"    Details: {results.detail(row)}")
+            for index1, index2 in results.body_pairs(row):
+                lw.WriteLine(f"      {body_names[i][index1]} <-> {body_names[j][index2]}")
+    
+    if unchecked_pairs:
+        lw.WriteLine("\n" + "-"*80)
+        lw.WriteLine(f"UNCHECKED PAIRS (time budget exhausted, run again with resume = True): {len(unchecked_pairs)}")
+        lw.WriteLine("-"*80)
+        
+        for i, j in unchecked_pairs:
+            lw.WriteLine(f"  {comp_names[i]} <-> {comp_names[j]}")
 
-def write_results_to_file(workPart, results):
+def write_results_to_file(workPart, results, comp_names, body_names, unchecked_pairs=()):
     """Write results to a text file"""
     try:
         # Get the part file path
@@ -224,35 +707,180 @@ def write_results_to_file(workPart, results):
         f.write("DETAILED RESULTS:\n")
         f.write("-"*80 + "\n")
         
-        for result in results:
-            status = "TOUCHING" if result['touching'] else "NOT TOUCHING"
-            f.write(f"\n{result['component1']} <-> {result['component2']}\n")
+        for row in range(len(results)):
+            status = "TOUCHING" if results.is_touching(row) else "NOT TOUCHING"
+            i, j = results.index1[row], results.index2[row]
+            f.write(f"\n{comp_names[i]} <-> {comp_names[j]}\n")
             f.write(f"  Status: {status}\n")
-            f.write(f"  Details: {result['details']}\n")
+            f.write(f"  Details: {results.detail(row)}\n")
+            for index1, index2 in results.body_pairs(row):
+                f.write(f"    {body_names[i][index1]} <-> {body_names[j][index2]}\n")
         
         # Write summary
-        touching_count = sum(1 for r in results if r['touching'])
+        touching_count = results.touching_count()
         total_count = len(results)
         
         f.write("\n" + "="*80 + "\n")
         f.write("SUMMARY:\n")
         f.write("="*80 + "\n")
-        f.write(f"Total component pairs checked: {total_count}\n")
+        f.write(f"Total component pairs decided: {total_count}\n")
+        f.write(f"  Checked exactly in NX: {results.method_count(PairTable.EXACT)}\n")
+        f.write(f"  Decided by offline screening: {results.method_count(PairTable.SCREENED)}\n")
+        f.write(f"  Skipped, bounding boxes apart: {results.method_count(PairTable.BOXES_APART)}\n")
         f.write(f"Touching pairs: {touching_count}\n")
         f.write(f"Non-touching pairs: {total_count - touching_count}\n")
+        if unchecked_pairs:
+            f.write(f"Unchecked pairs: {len(unchecked_pairs)}\n")
         
         if touching_count > 0:
             f.write("\n" + "-"*80 + "\n")
             f.write("TOUCHING COMPONENTS:\n")
             f.write("-"*80 + "\n")
             
-            for result in results:
-                if result['touching']:
-                    f.write(f"  {result['component1']} <-> {result['component2']}\n")
+            for row in results.touching_rows():
+                f.write(f"  {comp_names[results.index1[row]]} <-> {comp_names[results.index2[row]]}\n")
+        
+        if unchecked_pairs:
+            f.write("\n" + "-"*80 + "\n")
+            f.write(f"UNCHECKED PAIRS: {len(unchecked_pairs)}\n")
+            f.write("-"*80 + "\n")
+            
+            for i, j in unchecked_pairs:
+                f.write(f"  {comp_names[i]} <-> {comp_names[j]}\n")
     
     lw = NXOpen.Session.GetSession().ListingWindow
     lw.WriteLine(f"\nResults written to: {output_path}")
     return output_path
 
+def read_screening_file(path):
+    """Screening labels written by mesh_interference.py"""
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def apply_screening(pairs, comp_keys, screening, results):
+    """
+    Split component pairs by their offline screening label.
+    Pairs labelled apart or interfering are added to results, ambiguous pairs and
+    pairs with a component missing from the tessellation, or only partly exported,
+    stay for the exact check. Pairs absent from the screening are apart only when
+    both components were tessellated completely.
+    Returns remaining_pairs.
+    """
+    screened_keys = set(screening['instances']) - set(screening.get('incomplete', ()))
+    labels = {}
+    for pair in screening['pairs']:
+        labels[(pair['key1'], pair['key2'])] = pair['label']
+        labels[(pair['key2'], pair['key1'])] = pair['label']
+    
+    remaining_pairs = []
+    
+    for i, j in pairs:
+        if comp_keys[i] not in screened_keys or comp_keys[j] not in screened_keys:
+            remaining_pairs.append((i, j))
+            continue
+        
+        # Pairs missing from the screening file had bounding boxes apart
+        label = labels.get((comp_keys[i], comp_keys[j]), 'apart')
+        if label == 'ambiguous':
+            remaining_pairs.append((i, j))
+            continue
+        
+        results.append(i, j, label == 'interfering', f"Screened offline: {label} (tessellation)",
+                       method=PairTable.SCREENED)
+    
+    return remaining_pairs
+
+def store_results(workPart, tool, rows, options=None):
+    """Store pair rows as one run in the results_db SQLite file (results_store.py)"""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    if script_dir not in sys.path:
+        sys.path.insert(0, script_dir)
+    import results_store
+    
+    try:
+        part = workPart.FullPath
+    except:
+        part = workPart.Leaf
+    
+    results_store.record_run(results_db, tool, part, results_store.insert_pairs, rows, options)
+    lw = NXOpen.Session.GetSession().ListingWindow
+    lw.WriteLine(f"Results stored in: {results_db}")
+
+def get_state_file_path(workPart):
+    """Path of the JSON file carrying touching/unchecked pairs between runs"""
+    try:
+        part_path = workPart.FullPath
+        part_dir = os.path.dirname(part_path)
+        part_name = os.path.splitext(os.path.basename(part_path))[0]
+        return os.path.join(part_dir, f"{part_name}_interference_state.json")
+    except:
+        import tempfile
+        return os.path.join(tempfile.gettempdir(), "interference_state.json")
+
+def read_state_file(workPart):
+    """State saved by the previous run, None if there is none"""
+    try:
+        with open(get_state_file_path(workPart), 'r') as f:
+            return json.load(f)
+    except:
+        return None
+
+def pair_key(key1, key2):
+    """Component keys of a pair in sorted order, the same whatever the component order"""
+    return (key1, key2) if key1 <= key2 else (key2, key1)
+
+def merge_previous_results(results, previous_state, comp_keys):
+    """
+    Add the results saved in the state file by the previous run to results, for
+    the components still in the assembly. Returns the number of pairs added.
+    """
+    key_index = {comp_keys[index]: index for index in range(len(comp_keys))}
+    merged_count = 0
+    
+    for key1, key2, status, method, details, body_pairs in previous_state.get('results', []):
+        if key1 not in key_index or key2 not in key_index:
+            continue
+        i, j = key_index[key1], key_index[key2]
+        if i > j:
+            i, j = j, i
+            body_pairs = [(index2, index1) for index1, index2 in body_pairs]
+        results.append(i, j, status == PairTable.TOUCHING, details, body_pairs, method)
+        merged_count += 1
+    
+    return merged_count
+
+def write_state_file(workPart, results, comp_keys, unchecked_pairs, previous_state=None):
+    """
+    Save every result and the unchecked pairs by component key, so a resumed run
+    can report the whole sweep. Touching pairs of the previous run that were not
+    checked again are carried over.
+    """
+    checked = set()
+    touching = set()
+    for row in range(len(results)):
+        key = pair_key(comp_keys[results.index1[row]], comp_keys[results.index2[row]])
+        checked.add(key)
+        if results.is_touching(row):
+            touching.add(key)
+    
+    if previous_state is not None:
+        for pair in previous_state['touching']:
+            if pair_key(*pair) not in checked:
+                touching.add(pair_key(*pair))
+    
+    state = {
+        'results': [
+            (comp_keys[results.index1[row]], comp_keys[results.index2[row]], results.status[row],
+             results.method[row], results.detail(row), list(results.body_pairs(row)))
+            for row in range(len(results))],
+        'touching': sorted(touching),
+        'unchecked': [(comp_keys[i], comp_keys[j]) for i, j in unchecked_pairs]
+    }
+    
+    output_path = get_state_file_path(workPart)
+    with open(output_path, 'w') as f:
+        json.dump(state, f, indent=1)
+    return output_path
+
 if __name__ == '__main__':
     main()
\ No newline at end of file
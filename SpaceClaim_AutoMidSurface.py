@@ -15,14 +15,32 @@
     1. Modify the `min_thickness` and `max_thickness` variables according to your desired thickness range (in mm).
     2. Set `methode_by_body` to `True` to use the "By Body" method, or `False` to use the "By Surface" method.
     3. Run the script.
+    4. Bodies that fail are retried automatically (see `retry_failed`): the thickness range is
+       bisected around the estimated thickness of each body, then the face pair method is tried.
+       Every attempt is logged, and the next run starts with the parameters that worked.
 """
 
+import contextlib
+import csv
+import json
+import time
+import os
+
 min_thickness = 0
 max_thickness = 10
 extent_surf = True
 
 methode_by_body = True
 
+# Retry pass for the bodies that failed with the range above
+retry_failed = True
+max_attempts = 6
+# CSV log of all attempts, None for <document>_midsurface_attempts.csv
+# (load it into the results database with `python results_store.py <db> ingest <log>`)
+attempt_log = None
+# thickness.json from mesh_thickness.py, used for the estimated thickness when available
+thickness_report = None
+
 def main():
     """
     - Retrieves the root component and its properties.
@@ -37,21 +55,39 @@ def main():
     RootNameComp = comp.GetName()
     RootCompCount = len(comp.Components)
     print('Number of comp in design', RootNameComp, " is " , RootCompCount)
-    allSolid = comp.GetAllBodies()
-    for soli in allSolid:
-        not_active = soli.IsSuppressed
-        is_solid=soli.GetMaster().Shape.IsClosed
-        if not_active == False and is_solid == True:
-            # print(soli.IsSuppressed)
-            sel_i = Selection.Create(soli)
-            if methode_by_body==True:
-                print("Surface extraction by selecting body")
-                extract_mid_body(sel_i, min_thickness, max_thickness, extent_surf)
-            else:
-                print("Surface extraction by selecting two surface")
-                extract_mid_surf(soli)
+    log_path = get_attempt_log_path()
+    known_params = read_attempt_log(log_path)
+    first_methods = {}
+    with timed("Midsurface extraction"):
+        allSolid = comp.GetAllBodies()
+        for soli in allSolid:
+            not_active = soli.IsSuppressed
+            is_solid=soli.GetMaster().Shape.IsClosed
+            if not_active == False and is_solid == True:
+                # print(soli.IsSuppressed)
+                key = body_key(soli)
+                if key in known_params:
+                    method, min_t, max_t = known_params[key]
+                    print("Surface extraction with the parameters of the last successful run")
+                elif methode_by_body==True:
+                    method, min_t, max_t = "body", min_thickness, max_thickness
+                    print("Surface extraction by selecting body")
+                else:
+                    method, min_t, max_t = "surface", None, None
+                    print("Surface extraction by selecting two surface")
+                success = run_attempt(soli, method, min_t, max_t)
+                log_attempt(log_path, key, 1, method, min_t, max_t, success)
+                first_methods[key] = method
+    
+        if retry_failed == True and max_attempts > 1:
+            estimates = read_thickness_report(thickness_report)
+            for soli in allSolid:
+                not_active = soli.IsSuppressed
+                is_solid=soli.GetMaster().Shape.IsClosed
+                if not_active == False and is_solid == True:
+                    retry_body(soli, log_path, estimates, first_methods.get(body_key(soli)))
      
-    rename_midsurf(comp)
+        rename_midsurf(comp)
             
     print("Surface extracted for these solids")      
     for soli in allSolid:
@@ -71,6 +107,161 @@ def main():
             name = soli.GetName()
             print(parentCo, "-->" ,name)
  
+@contextlib.contextmanager
+def timed(label):
+    """
+    - Prints "<label>: <seconds> s" when the block ends, also when it fails.
+    """
+    start = time.time()
+    try:
+        yield
+    finally:
+        print("%s: %.2f s" % (label, time.time() - start))
+
+def body_key(soli):
+    """
+    - Returns (component name, body name), the key of a body in the attempt log.
+    """
+    return (soli.Parent.GetName(), soli.GetName())
+
+def run_attempt(soli, method, min_t=None, max_t=None):
+    """
+    - Runs one extraction with the given method ("body" or "surface") and range (mm).
+    - Returns True when the solid got suppressed, i.e. the midsurface was created.
+    """
+    if method == "body":
+        extract_mid_body(Selection.Create(soli), min_t, max_t, extent_surf)
+    else:
+        extract_mid_surf(soli)
+    return soli.IsSuppressed == True
+
+def estimate_thickness(soli, estimates):
+    """
+    - Returns the estimated wall thickness (mm) of a solid body: the median of the
+      thickness report when it has the body, otherwise 2 * volume / surface area,
+      which is exact for a thin plate.
+    """
+    key = body_key(soli)
+    if key in estimates:
+        return estimates[key]
+    shape = soli.GetMaster().Shape
+    return 2.0 * shape.Volume / shape.SurfaceArea * 1000.0
+
+def bisection_widths(count):
+    """
+    - Returns `count` relative half widths of the thickness range, bisecting [0, 1]
+      breadth first: 0.5, then the middle of each half (0.25, 0.75), then of each
+      quarter (0.125, 0.375, 0.625, 0.875), and so on.
+    """
+    widths = []
+    level = 2
+    while len(widths) < count:
+        for k in range(1, level, 2):
+            widths.append(float(k) / level)
+        level *= 2
+    return widths[:count]
+
+def retry_body(soli, log_path, estimates, first_method):
+    """
+    - Retries a failed solid with thickness ranges bisected around its estimated
+      thickness, then with the face pair method unless the first attempt already
+      used it: `max_attempts` attempts in total, the first pass included.
+    - Logs every attempt. Returns True on success.
+    """
+    key = body_key(soli)
+    thickness = estimate_thickness(soli, estimates)
+    print("Retrying", key[0], "-->", key[1], "estimated thickness %.3f mm" % thickness)
+
+    try_surface = first_method != "surface"
+    range_attempts = max_attempts - 1
+    if try_surface:
+        range_attempts -= 1
+
+    attempt = 1
+    for width in bisection_widths(range_attempts):
+        attempt += 1
+        min_t = thickness * (1 - width)
+        max_t = thickness * (1 + width)
+        success = run_attempt(soli, "body", min_t, max_t)
+        log_attempt(log_path, key, attempt, "body", min_t, max_t, success)
+        if success:
+            return True
+
+    if not try_surface:
+        return False
+
+    attempt += 1
+    success = run_attempt(soli, "surface")
+    log_attempt(log_path, key, attempt, "surface", None, None, success)
+    return success
+
+def get_attempt_log_path():
+    """
+    - Returns `attempt_log`, or `<document>_midsurface_attempts.csv` next to the
+      document, or a file in the temp folder when the document has not been saved.
+    """
+    if attempt_log is not None:
+        return attempt_log
+    try:
+        doc_path = Window.ActiveWindow.Document.Path
+        return os.path.splitext(doc_path)[0] + "_midsurface_attempts.csv"
+    except:
+        import tempfile
+        return os.path.join(tempfile.gettempdir(), "midsurface_attempts.csv")
+
+def log_attempt(log_path, key, attempt, method, min_t, max_t, success):
+    """
+    - Appends one attempt to the CSV log (header written with the first row).
+    """
+    new_file = not os.path.exists(log_path)
+    f = open(log_path, 'ab')
+    try:
+        writer = csv.writer(f)
+        if new_file:
+            writer.writerow(["component", "body", "attempt", "method", "min_t", "max_t", "success"])
+        writer.writerow([key[0], key[1], attempt, method,
+                         "" if min_t is None else "%.6g" % min_t,
+                         "" if max_t is None else "%.6g" % max_t,
+                         int(success)])
+    finally:
+        f.close()
+
+def read_attempt_log(log_path):
+    """
+    - Returns {(component, body): (method, min_t, max_t)} with the last successful
+      attempt of every body in the log.
+    """
+    known = {}
+    if not os.path.exists(log_path):
+        return known
+    f = open(log_path, 'rb')
+    try:
+        for row in csv.DictReader(f):
+            if row["success"] == "1":
+                min_t = float(row["min_t"]) if row["min_t"] else None
+                max_t = float(row["max_t"]) if row["max_t"] else None
+                known[(row["component"], row["body"])] = (row["method"], min_t, max_t)
+    finally:
+        f.close()
+    return known
+
+def read_thickness_report(report_path):
+    """
+    - Returns {(component, body): median thickness} from a mesh_thickness.py report.
+    """
+    estimates = {}
+    if report_path is None or not os.path.exists(report_path):
+        return estimates
+    f = open(report_path, 'r')
+    try:
+        report = json.load(f)
+    finally:
+        f.close()
+    for body in report['bodies']:
+        if body.get('median') is not None:
+            estimates[(body['component'], body['name'])] = body['median']
+    return estimates
+
 def rename_midsurf(comp):
     """
     - Iterates over all bodies.
@@ -15,26 +15,34 @@
     1. Modify the `min_thickness` and `max_thickness` variables according to your desired thickness range (in mm).
     2. Set `methode_by_body` to `True` to use the "By Body" method, or `False` to use the "By Surface" method.
     3. Run the script.
+    4. Set `interactive` to `False` for batch runs: the values below are used without any dialog,
+       and the WinForms assemblies are never loaded.
 """
 
-import clr
-clr.AddReference('System')
-clr.AddReference('System.Windows.Forms')
-import System.Windows.Forms as WinForms
-from System.Drawing import Point as pt
+import contextlib
+import time
 
-# min_thickness = 0
-# max_thickness = 10
-# extent_surf = True
+# Ask for the values in dialog boxes; False uses the defaults below as they are
+interactive = True
 
-# methode_by_body = True
+# Defaults, shown in the dialog boxes when interactive
+default_min_thickness = 0
+default_max_thickness = 10
+default_extent_surf = 1
+default_methode_by_body = 1
 
 def main():
-    min_thickness = int(inputBox("min_thickness", "Min thickness(mm):", "0"))
-    max_thickness = int(inputBox("max_thickness", "Max thickness(mm):", "10"))
-    
-    extent_surf = int(inputBox("extent_surf:0/1", "Extend 1:Yes/0:No", "1"))
-    methode_by_body = int(inputBox("methode_by_body:0/1", "1:Body 0:Surf", "1"))
+    if interactive == True:
+        min_thickness = int(inputBox("min_thickness", "Min thickness(mm):", str(default_min_thickness)))
+        max_thickness = int(inputBox("max_thickness", "Max thickness(mm):", str(default_max_thickness)))
+        
+        extent_surf = int(inputBox("extent_surf:0/1", "Extend 1:Yes/0:No", str(default_extent_surf)))
+        methode_by_body = int(inputBox("methode_by_body:0/1", "1:Body 0:Surf", str(default_methode_by_body)))
+    else:
+        min_thickness = default_min_thickness
+        max_thickness = default_max_thickness
+        extent_surf = default_extent_surf
+        methode_by_body = default_methode_by_body
     
     if extent_surf==1:
         extent_surf = True
@@ -59,21 +67,22 @@ def main():
     RootNameComp = comp.GetName()
     RootCompCount = len(comp.Components)
     print('Number of comp in design', RootNameComp, " is " , RootCompCount)
-    allSolid = comp.GetAllBodies()
-    for soli in allSolid:
-        not_active = soli.IsSuppressed
-        is_solid=soli.GetMaster().Shape.IsClosed
-        if not_active == False and is_solid == True:
-            # print(soli.IsSuppressed)
-            sel_i = Selection.Create(soli)
-            if methode_by_body==True:
-                print("Surface extraction by selecting body")
-                extract_mid_body(sel_i, min_thickness, max_thickness, extent_surf)
-            else:
-                print("Surface extraction by selecting two surface")
-                extract_mid_surf(soli)
+    with timed("Midsurface extraction"):
+        allSolid = comp.GetAllBodies()
+        for soli in allSolid:
+            not_active = soli.IsSuppressed
+            is_solid=soli.GetMaster().Shape.IsClosed
+            if not_active == False and is_solid == True:
+                # print(soli.IsSuppressed)
+                sel_i = Selection.Create(soli)
+                if methode_by_body==True:
+                    print("Surface extraction by selecting body")
+                    extract_mid_body(sel_i, min_thickness, max_thickness, extent_surf)
+                else:
+                    print("Surface extraction by selecting two surface")
+                    extract_mid_surf(soli)
      
-    rename_midsurf(comp)
+        rename_midsurf(comp)
             
     print("Surface extracted for these solids")      
     for soli in allSolid:
@@ -93,6 +102,17 @@ def main():
             name = soli.GetName()
             print(parentCo, "-->" ,name)
  
+@contextlib.contextmanager
+def timed(label):
+    """
+    - Prints "<label>: <seconds> s" when the block ends, also when it fails.
+    """
+    start = time.time()
+    try:
+        yield
+    finally:
+        print("%s: %.2f s" % (label, time.time() - start))
+
 def rename_midsurf(comp):
     """
     - Iterates over all bodies.
@@ -192,8 +212,14 @@ def inputBox(title, prompt, defaultValue):
     
     This function uses the `WinForms` library to create a modal dialog box with a title, prompt, and a text box. The `defaultValue` is displayed in the text box initially. The user can enter their own text, or leave the default value and simply click the "OK" button. Clicking the "OK" button closes the dialog box and the function returns the text entered by the user, or the `defaultValue` if the user entered nothing.
     
-    **Note:** This function requires the `WinForms` library to be installed and imported. If `WinForms` is not available, a `NotImplementedError` is raised.
+    **Note:** This function requires the `WinForms` library. It is loaded here, on first use, so that non-interactive runs never load the UI assemblies.
 """
+    import clr
+    clr.AddReference('System')
+    clr.AddReference('System.Windows.Forms')
+    import System.Windows.Forms as WinForms
+    from System.Drawing import Point as pt
+    
     form = WinForms.Form()
     form.Text = title
     label = WinForms.Label()
@@ -0,0 +1,125 @@
+"""
+@Date:      October, 2026
+@status:    testing
+@python:    IronPython
+@SpaceClaim: V232
+@Overview:
+    This script exports the tessellation of every active closed solid body of the
+    design as a binary STL file (in mm), together with a manifest.json listing the
+    bodies and their components. The export is read by `mesh_thickness.py`, which
+    computes a wall thickness map per body and recommends the thickness range
+    for the midsurface scripts before any `Midsurface` command runs.
+@Usage:
+    1. Set `export_dir` to the output folder, or leave it `None` to export next to the document.
+    2. Adjust `surface_deviation` (mm) for a finer or coarser tessellation.
+    3. Run the script, then run `python mesh_thickness.py <export_dir>/manifest.json`.
+"""
+
+import json
+import os
+import struct
+
+export_dir = None
+surface_deviation = 0.05
+angle_deviation = 10
+
+def main():
+    """
+    - Retrieves all bodies of the root component.
+    - Writes one STL file per active closed solid body.
+    - Writes the manifest with component name, body name and file of every body.
+    """
+
+    comp = GetRootPart()
+    output_dir = get_export_dir()
+    options = TessellationOptions(MM(surface_deviation), DEG(angle_deviation))
+
+    bodies = []
+    allSolid = comp.GetAllBodies()
+    for index, soli in enumerate(allSolid):
+        not_active = soli.IsSuppressed
+        is_solid = soli.GetMaster().Shape.IsClosed
+        if not_active == False and is_solid == True:
+            parentCo = soli.Parent.GetName()
+            name = soli.GetName()
+            file_name = "body_%d.stl" % index
+            count = write_body_stl(soli.GetMaster().Shape, options, os.path.join(output_dir, file_name))
+            bodies.append({'component': parentCo, 'name': name, 'file': file_name, 'triangles': count})
+            print(parentCo, "-->", name, ":", count, "triangles")
+
+    manifest_path = os.path.join(output_dir, "manifest.json")
+    with open(manifest_path, 'w') as f:
+        json.dump({'units': 'mm', 'bodies': bodies}, f, indent=1)
+
+    print("Tessellation of", len(bodies), "bodies written to", manifest_path)
+
+def get_export_dir():
+    """
+    - Returns `export_dir`, or a `<document>_tessellation` folder next to the document,
+      or the temp folder when the document has not been saved.
+    """
+    output_dir = export_dir
+    if output_dir is None:
+        try:
+            doc_path = Window.ActiveWindow.Document.Path
+            output_dir = os.path.splitext(doc_path)[0] + "_tessellation"
+        except:
+            import tempfile
+            output_dir = os.path.join(tempfile.gettempdir(), "tessellation")
+
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+    return output_dir
+
+def write_body_stl(shape, options, path):
+    """
+    - Tessellates all faces of a body and writes them as binary STL in mm.
+    - Facets are oriented with the tessellation vertex normals (outward).
+    - Returns the number of triangles written.
+    """
+    records = []
+    tessellation = shape.GetTessellation(shape.Faces, options)
+    for face_tess in tessellation.Values:
+        vertices = face_tess.Vertices
+        for facet in face_tess.Facets:
+            v0 = vertices[facet.Vertex0]
+            v1 = vertices[facet.Vertex1]
+            v2 = vertices[facet.Vertex2]
+            p0 = to_mm(v0.Position)
+            p1 = to_mm(v1.Position)
+            p2 = to_mm(v2.Position)
+
+            normal = cross(sub(p1, p0), sub(p2, p0))
+            vertex_normal = (v0.Normal.X + v1.Normal.X + v2.Normal.X,
+                             v0.Normal.Y + v1.Normal.Y + v2.Normal.Y,
+                             v0.Normal.Z + v1.Normal.Z + v2.Normal.Z)
+            if dot(normal, vertex_normal) < 0:
+                p1, p2 = p2, p1
+                normal = (-normal[0], -normal[1], -normal[2])
+
+            records.append(struct.pack('<12fH', normal[0], normal[1], normal[2],
+                                       p0[0], p0[1], p0[2], p1[0], p1[1], p1[2], p2[0], p2[1], p2[2], 0))
+
+    f = open(path, 'wb')
+    try:
+        f.write(b"SpaceClaim tessellation".ljust(80, b" "))
+        f.write(struct.pack('<I', len(records)))
+        f.write(b"".join(records))
+    finally:
+        f.close()
+    return len(records)
+
+def to_mm(point):
+    return (point.X * 1000.0, point.Y * 1000.0, point.Z * 1000.0)
+
+def sub(a, b):
+    return (a[0] - b[0], a[1] - b[1], a[2] - b[2])
+
+def cross(a, b):
+    return (a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2], a[0] * b[1] - a[1] * b[0])
+
+def dot(a, b):
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+
+main()
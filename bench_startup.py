@@ -0,0 +1,136 @@
+"""
+Startup benchmark of the journal and tool entry points.
+
+Every entry point is imported in a fresh interpreter, several times, and the
+median import time and process time are reported together with the NXOpen
+submodules and heavy libraries the import pulled in. Journals are only
+imported (their `if __name__ == '__main__'` guard keeps main from running),
+so this measures what every batch invocation pays before any work starts.
+
+Outside NX, where NXOpen cannot be imported, a minimal stand-in package is
+generated in a temporary directory: every attribute of it is a permissive
+object, so module level code of the journals runs without a session. The
+SpaceClaim scripts run main() on load and need the IronPython host, so they
+are not part of the benchmark.
+
+Usage:
+    python bench_startup.py
+    python bench_startup.py --repeat 20 nx_hello_world NX_Comp_touch
+"""
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ENTRY_POINTS = [
+    'nx_lw_hello_world',
+    'nx_UI_Hello_world',
+    'nx_hello_world',
+    'NX_Comp_touch',
+    'nx_named_face_data',
+    'nx_export_tessellation',
+    'nx_worker',
+    'mesh_bvh',
+    'mesh_interference',
+    'mesh_thickness',
+    'results_store',
+]
+
+# Libraries worth reporting when an import loads them
+HEAVY_MODULES = ('numpy', 'sqlite3', 'socketserver', 'concurrent.futures')
+
+# Submodules of the stand-in NXOpen package, as imported by the journals
+FAKE_SUBMODULES = ('UF', 'GeometricAnalysis', 'Assemblies')
+
+FAKE_MODULE_SOURCE = '''\
+class _Anything:
+    """Stand-in for any NXOpen object: every attribute and call returns another one"""
+    def __getattr__(self, name):
+        return _Anything()
+    def __call__(self, *args, **kwargs):
+        return _Anything()
+    def __iter__(self):
+        return iter(())
+
+def __getattr__(name):
+    if name.startswith('__'):
+        raise AttributeError(name)
+    return _Anything()
+'''
+
+PROBE = '''\
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "modules": sorted(sys.modules)}}))
+'''
+
+
+def make_fake_api(directory):
+    """Write the stand-in NXOpen package into directory"""
+    package = os.path.join(directory, 'NXOpen')
+    os.makedirs(package, exist_ok=True)
+    for name in ('__init__',) + FAKE_SUBMODULES:
+        with open(os.path.join(package, f"{name}.py"), 'w') as f:
+            f.write(FAKE_MODULE_SOURCE)
+    return directory
+
+
+def measure(module, repeat, env):
+    """Median import and process seconds of module, and the modules it loaded"""
+    import_times = []
+    process_times = []
+    loaded = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, '-c', PROBE.format(module=module)],
+                                env=env, capture_output=True, text=True, check=True).stdout
+        process_times.append(time.perf_counter() - start)
+
+        probe = json.loads(output.strip().splitlines()[-1])
+        import_times.append(probe['seconds'])
+        loaded = probe['modules']
+
+    host = [name for name in loaded if name.startswith('NXOpen.')]
+    heavy = [name for name in HEAVY_MODULES if name in loaded]
+    return statistics.median(import_times), statistics.median(process_times), host, heavy
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import time per journal and tool entry point")
+    parser.add_argument('modules', nargs='*', default=ENTRY_POINTS, help="entry points (default: all)")
+    parser.add_argument('--repeat', type=int, default=5, help="fresh interpreters per entry point")
+    parser.add_argument('--fake-api', action='store_true',
+                        help="use the stand-in NXOpen package even when NXOpen is installed")
+    args = parser.parse_args(argv)
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as fake_dir:
+        path = [script_dir]
+        if args.fake_api or importlib.util.find_spec('NXOpen') is None:
+            path.insert(0, make_fake_api(fake_dir))
+            print("NXOpen: stand-in package (import times exclude the real host modules)\n")
+
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(path + [env['PYTHONPATH']] if env.get('PYTHONPATH') else path)
+        env['PYTHONDONTWRITEBYTECODE'] = '1'
+
+        print(f"{'entry point':<24} {'import ms':>10} {'process ms':>11}  loaded")
+        for module in args.modules:
+            try:
+                import_seconds, process_seconds, host, heavy = measure(module, args.repeat, env)
+            except subprocess.CalledProcessError as e:
+                print(f"{module:<24} failed: {e.stderr.strip().splitlines()[-1] if e.stderr.strip() else e}")
+                continue
+            loaded = ", ".join(host + heavy) or "-"
+            print(f"{module:<24} {import_seconds * 1000:>10.1f} {process_seconds * 1000:>11.1f}  {loaded}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,397 @@
+"""
+Triangle mesh helpers for the offline engines that run outside NX/SpaceClaim:
+    - binary / ASCII STL reading (memory-mapped) and binary STL writing,
+    - an implicit bounding volume hierarchy built from Morton-sorted triangles,
+    - synthetic meshes (boxes, spheres, extruded profiles) for benchmarks.
+Everything works on NumPy arrays of triangles with shape (n, 3, 3).
+"""
+import os
+
+import numpy as np
+
+STL_HEADER_SIZE = 80
+STL_RECORD = np.dtype([
+    ('normal', '<f4', (3,)),
+    ('vertices', '<f4', (3, 3)),
+    ('attribute', '<u2'),
+])
+
+
+def read_stl(path):
+    """Triangles of a binary or ASCII STL file as a float64 array (n, 3, 3)"""
+    with open(path, 'rb') as f:
+        header = f.read(STL_HEADER_SIZE + 4)
+
+    if len(header) == STL_HEADER_SIZE + 4:
+        count = int(np.frombuffer(header[STL_HEADER_SIZE:], dtype='<u4')[0])
+        if STL_HEADER_SIZE + 4 + count * STL_RECORD.itemsize == os.path.getsize(path):
+            if count == 0:
+                return np.zeros((0, 3, 3))
+            records = np.memmap(path, dtype=STL_RECORD, mode='r', offset=STL_HEADER_SIZE + 4, shape=(count,))
+            return np.array(records['vertices'], dtype=np.float64)
+
+    return _read_ascii_stl(path)
+
+
+def _read_ascii_stl(path):
+    vertices = []
+    with open(path, 'r') as f:
+        for line in f:
+            words = line.split()
+            if words and words[0] == 'vertex':
+                vertices.append([float(w) for w in words[1:4]])
+    return np.array(vertices, dtype=np.float64).reshape(-1, 3, 3)
+
+
+def write_stl(path, triangles, header=b"mesh_bvh binary STL"):
+    """Write triangles (n, 3, 3) as binary STL"""
+    triangles = np.asarray(triangles, dtype=np.float64)
+    records = np.zeros(len(triangles), dtype=STL_RECORD)
+    records['normal'] = unit_normals(triangles)
+    records['vertices'] = triangles
+    with open(path, 'wb') as f:
+        f.write(header[:STL_HEADER_SIZE].ljust(STL_HEADER_SIZE, b' '))
+        f.write(np.array([len(triangles)], dtype='<u4').tobytes())
+        f.write(records.tobytes())
+
+
+def transform_triangles(triangles, rotation, origin):
+    """Apply x -> rotation @ x + origin to every vertex"""
+    return triangles @ np.asarray(rotation, dtype=np.float64).T + np.asarray(origin, dtype=np.float64)
+
+
+def unit_normals(triangles):
+    """Unit normals following the vertex winding (outward for a closed STL)"""
+    normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    lengths = np.linalg.norm(normals, axis=1)
+    lengths[lengths == 0] = 1.0
+    return normals / lengths[:, None]
+
+
+def triangle_areas(triangles):
+    return 0.5 * np.linalg.norm(np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0]), axis=1)
+
+
+def morton_codes(points, bits=10):
+    """30-bit Morton codes of points quantized inside their bounding box"""
+    lo = points.min(axis=0)
+    extent = points.max(axis=0) - lo
+    extent[extent == 0] = 1.0
+    cells = ((points - lo) / extent * ((1 << bits) - 1)).astype(np.uint64)
+
+    codes = np.zeros(len(points), dtype=np.uint64)
+    for axis in range(3):
+        x = cells[:, axis]
+        x = (x | (x << np.uint64(16))) & np.uint64(0x030000FF)
+        x = (x | (x << np.uint64(8))) & np.uint64(0x0300F00F)
+        x = (x | (x << np.uint64(4))) & np.uint64(0x030C30C3)
+        x = (x | (x << np.uint64(2))) & np.uint64(0x09249249)
+        codes |= x << np.uint64(axis)
+    return codes
+
+
+class BVH:
+    """
+    Implicit binary bounding volume hierarchy over triangles.
+
+    Triangles are sorted by the Morton code of their centroid and cut into leaves
+    of leaf_size consecutive triangles. Nodes are stored heap-ordered: node 1 is
+    the root, the children of node k are 2k and 2k+1, and the leaves are nodes
+    n_leaves .. 2*n_leaves-1. Padding leaves have an empty (inverted) box.
+    """
+    __slots__ = ('triangles', 'order', 'leaf_size', 'n_leaves', 'box_min', 'box_max')
+
+    def __init__(self, triangles, leaf_size=8):
+        triangles = np.asarray(triangles, dtype=np.float64)
+        n = len(triangles)
+
+        self.leaf_size = leaf_size
+        if n:
+            self.order = np.argsort(morton_codes(triangles.mean(axis=1)), kind='stable')
+        else:
+            self.order = np.zeros(0, dtype=np.int64)
+        self.triangles = triangles[self.order]
+
+        used_leaves = max(1, -(-n // leaf_size))
+        self.n_leaves = 1 << (used_leaves - 1).bit_length()
+
+        self.box_min = np.full((2 * self.n_leaves, 3), np.inf)
+        self.box_max = np.full((2 * self.n_leaves, 3), -np.inf)
+
+        if n:
+            padded = np.full((used_leaves * leaf_size, 3, 3), np.nan)
+            padded[:n] = self.triangles
+            padded = padded.reshape(used_leaves, leaf_size * 3, 3)
+            leaves = slice(self.n_leaves, self.n_leaves + used_leaves)
+            self.box_min[leaves] = np.nanmin(padded, axis=1)
+            self.box_max[leaves] = np.nanmax(padded, axis=1)
+
+        # Internal nodes, one tree level at a time from the leaves up
+        level = self.n_leaves
+        while level > 1:
+            parents = np.arange(level // 2, level)
+            self.box_min[parents] = np.minimum(self.box_min[2 * parents], self.box_min[2 * parents + 1])
+            self.box_max[parents] = np.maximum(self.box_max[2 * parents], self.box_max[2 * parents + 1])
+            level //= 2
+
+    def __len__(self):
+        return len(self.triangles)
+
+    @property
+    def bounds(self):
+        """(min, max) corners of the whole mesh"""
+        return self.box_min[1], self.box_max[1]
+
+    def is_leaf(self, nodes):
+        return nodes >= self.n_leaves
+
+    def leaf_triangles(self, leaves):
+        """Sorted triangle indices of each leaf node, (m, leaf_size), -1 for padding"""
+        indices = (leaves - self.n_leaves)[:, None] * self.leaf_size + np.arange(self.leaf_size)
+        indices[indices >= len(self.triangles)] = -1
+        return indices
+
+
+def boxes_overlap(min_a, max_a, min_b, max_b, tolerance=0.0):
+    """Row-wise test of axis aligned boxes whose gap is at most tolerance"""
+    return np.all((min_a <= max_b + tolerance) & (min_b <= max_a + tolerance), axis=-1)
+
+
+def overlapping_leaves(bvh_a, bvh_b, tolerance=0.0):
+    """
+    All leaf pairs (leaf_a, leaf_b) whose boxes are within tolerance, found by a
+    breadth-first traversal of both trees that handles the whole frontier at once.
+    """
+    nodes_a = np.array([1])
+    nodes_b = np.array([1])
+    found_a = []
+    found_b = []
+
+    while len(nodes_a):
+        keep = boxes_overlap(bvh_a.box_min[nodes_a], bvh_a.box_max[nodes_a],
+                             bvh_b.box_min[nodes_b], bvh_b.box_max[nodes_b], tolerance)
+        nodes_a = nodes_a[keep]
+        nodes_b = nodes_b[keep]
+
+        leaf_a = bvh_a.is_leaf(nodes_a)
+        leaf_b = bvh_b.is_leaf(nodes_b)
+        done = leaf_a & leaf_b
+        found_a.append(nodes_a[done])
+        found_b.append(nodes_b[done])
+
+        # Descend into the tree that is not at a leaf yet, the larger box first
+        extent_a = np.max(bvh_a.box_max[nodes_a] - bvh_a.box_min[nodes_a], axis=1)
+        extent_b = np.max(bvh_b.box_max[nodes_b] - bvh_b.box_min[nodes_b], axis=1)
+        split_a = ~done & ~leaf_a & (leaf_b | (extent_a >= extent_b))
+        split_b = ~done & ~split_a
+
+        nodes_a = np.concatenate([2 * nodes_a[split_a], 2 * nodes_a[split_a] + 1,
+                                  nodes_a[split_b], nodes_a[split_b]])
+        nodes_b = np.concatenate([nodes_b[split_a], nodes_b[split_a],
+                                  2 * nodes_b[split_b], 2 * nodes_b[split_b] + 1])
+
+    return np.concatenate(found_a), np.concatenate(found_b)
+
+
+def candidate_triangle_pairs(bvh_a, bvh_b, tolerance=0.0):
+    """Sorted-triangle index pairs (ia, ib) whose triangle boxes are within tolerance"""
+    leaves_a, leaves_b = overlapping_leaves(bvh_a, bvh_b, tolerance)
+    if not len(leaves_a):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    ia = np.repeat(bvh_a.leaf_triangles(leaves_a), bvh_b.leaf_size, axis=1).reshape(-1)
+    ib = np.tile(bvh_b.leaf_triangles(leaves_b), (1, bvh_a.leaf_size)).reshape(-1)
+
+    valid = (ia >= 0) & (ib >= 0)
+    ia = ia[valid]
+    ib = ib[valid]
+
+    tri_a = bvh_a.triangles[ia]
+    tri_b = bvh_b.triangles[ib]
+    keep = boxes_overlap(tri_a.min(axis=1), tri_a.max(axis=1), tri_b.min(axis=1), tri_b.max(axis=1), tolerance)
+    return ia[keep], ib[keep]
+
+
+def box_mesh(size=(1.0, 1.0, 1.0), center=(0.0, 0.0, 0.0)):
+    """Closed, outward oriented box of 12 triangles"""
+    half = np.asarray(size, dtype=np.float64) / 2
+    corners = np.array([[x, y, z] for x in (-1, 1) for y in (-1, 1) for z in (-1, 1)], dtype=np.float64)
+    corners = corners * half + np.asarray(center, dtype=np.float64)
+    faces = [
+        (0, 1, 3), (0, 3, 2),  # -x
+        (4, 6, 7), (4, 7, 5),  # +x
+        (0, 4, 5), (0, 5, 1),  # -y
+        (2, 3, 7), (2, 7, 6),  # +y
+        (0, 2, 6), (0, 6, 4),  # -z
+        (1, 5, 7), (1, 7, 3),  # +z
+    ]
+    return corners[np.array(faces)]
+
+
+def sphere_mesh(radius=1.0, center=(0.0, 0.0, 0.0), segments=32):
+    """Closed, outward oriented UV sphere"""
+    rings = segments // 2
+    theta = np.linspace(0, np.pi, rings + 1)
+    phi = np.linspace(0, 2 * np.pi, segments + 1)
+    t, p = np.meshgrid(theta, phi, indexing='ij')
+    grid = np.stack([np.sin(t) * np.cos(p), np.sin(t) * np.sin(p), np.cos(t)], axis=-1) * radius
+    grid = grid + np.asarray(center, dtype=np.float64)
+
+    a = grid[:-1, :-1].reshape(-1, 3)
+    b = grid[1:, :-1].reshape(-1, 3)
+    c = grid[1:, 1:].reshape(-1, 3)
+    d = grid[:-1, 1:].reshape(-1, 3)
+    triangles = np.concatenate([np.stack([a, b, c], axis=1), np.stack([a, c, d], axis=1)])
+
+    # Drop the degenerate triangles at the poles
+    return triangles[triangle_areas(triangles) > 1e-12 * radius * radius]
+
+
+def extrude_polygon(points, height, divisions=1):
+    """
+    Closed prism from a simple counter-clockwise 2-D polygon extruded along +z.
+    Side walls are split into `divisions` rows so they carry interior samples.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    n = len(points)
+    caps = triangulate_polygon(points)
+
+    bottom = np.column_stack([points, np.zeros(n)])
+    top = np.column_stack([points, np.full(n, height)])
+    triangles = [bottom[caps[:, ::-1]], top[caps]]
+
+    z = np.linspace(0, height, divisions + 1)
+    for k in range(n):
+        p0 = points[k]
+        p1 = points[(k + 1) % n]
+        for z0, z1 in zip(z[:-1], z[1:]):
+            a = [p0[0], p0[1], z0]
+            b = [p1[0], p1[1], z0]
+            c = [p1[0], p1[1], z1]
+            d = [p0[0], p0[1], z1]
+            triangles.append(np.array([[a, b, c], [a, c, d]]))
+
+    return np.concatenate(triangles)
+
+
+def triangulate_polygon(points):
+    """Ear clipping of a simple counter-clockwise polygon, returns (n-2, 3) indices"""
+    remaining = list(range(len(points)))
+    triangles = []
+
+    def cross(o, a, b):
+        return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+    while len(remaining) > 3:
+        for k in range(len(remaining)):
+            i0, i1, i2 = remaining[k - 1], remaining[k], remaining[(k + 1) % len(remaining)]
+            p0, p1, p2 = points[i0], points[i1], points[i2]
+            if cross(p0, p1, p2) <= 0:
+                continue
+            if any(cross(p0, p1, points[j]) >= 0 and cross(p1, p2, points[j]) >= 0 and cross(p2, p0, points[j]) >= 0
+                   for j in remaining if j not in (i0, i1, i2)):
+                continue
+            triangles.append((i0, i1, i2))
+            remaining.pop(k)
+            break
+        else:
+            raise ValueError("Polygon is not simple or not counter-clockwise")
+
+    triangles.append(tuple(remaining))
+    return np.array(triangles)
+
+
+def ray_triangle_distance(origins, directions, triangles, eps=1e-12):
+    """Ray parameter t of the hit of each ray with its triangle (row-wise), inf on a miss"""
+    e1 = triangles[:, 1] - triangles[:, 0]
+    e2 = triangles[:, 2] - triangles[:, 0]
+    h = np.cross(directions, e2)
+    det = np.einsum('ij,ij->i', e1, h)
+    valid = np.abs(det) > eps * np.einsum('ij,ij->i', e1, e1)
+    inv = 1.0 / np.where(valid, det, 1.0)
+    s = origins - triangles[:, 0]
+    u = inv * np.einsum('ij,ij->i', s, h)
+    q = np.cross(s, e1)
+    v = inv * np.einsum('ij,ij->i', directions, q)
+    t = inv * np.einsum('ij,ij->i', e2, q)
+    hit = valid & (u >= 0) & (v >= 0) & (u + v <= 1)
+    return np.where(hit, t, np.inf)
+
+
+def ray_nearest_hits(bvh, origins, directions, t_min=0.0, t_max=np.inf):
+    """
+    Nearest hit of every ray (origins + t * directions, t_min < t < t_max).
+    All rays traverse the tree together: the frontier of (ray, node) pairs is
+    expanded one level per step and nodes beyond the current best hit are pruned.
+
+    Returns:
+        distance: ray parameter of the nearest hit, inf where nothing was hit
+        triangle: index of the hit triangle in the input order, -1 where nothing was hit
+    """
+    origins = np.asarray(origins, dtype=np.float64)
+    directions = np.asarray(directions, dtype=np.float64)
+    n = len(origins)
+
+    best = np.full(n, t_max, dtype=np.float64)
+    best_triangle = np.full(n, -1, dtype=np.int64)
+    if n == 0 or len(bvh) == 0:
+        return np.full(n, np.inf), best_triangle
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inverse = 1.0 / directions
+
+        rays = np.arange(n)
+        nodes = np.ones(n, dtype=np.int64)
+
+        while len(rays):
+            # Slab test of each ray against its node box
+            t0 = (bvh.box_min[nodes] - origins[rays]) * inverse[rays]
+            t1 = (bvh.box_max[nodes] - origins[rays]) * inverse[rays]
+            t_near = np.fmax.reduce(np.fmin(t0, t1), axis=1)
+            t_far = np.fmin.reduce(np.fmax(t0, t1), axis=1)
+            keep = (t_near <= t_far) & (t_far > t_min) & (t_near < best[rays])
+            rays = rays[keep]
+            nodes = nodes[keep]
+
+            leaf = bvh.is_leaf(nodes)
+            if leaf.any():
+                leaf_rays = np.repeat(rays[leaf], bvh.leaf_size)
+                leaf_triangles = bvh.leaf_triangles(nodes[leaf]).reshape(-1)
+                valid = leaf_triangles >= 0
+                leaf_rays = leaf_rays[valid]
+                leaf_triangles = leaf_triangles[valid]
+
+                t = ray_triangle_distance(origins[leaf_rays], directions[leaf_rays], bvh.triangles[leaf_triangles])
+                closer = (t > t_min) & (t < best[leaf_rays])
+                np.minimum.at(best, leaf_rays[closer], t[closer])
+                winner = closer & (t == best[leaf_rays])
+                best_triangle[leaf_rays[winner]] = leaf_triangles[winner]
+
+            inner = ~leaf
+            rays = np.concatenate([rays[inner], rays[inner]])
+            nodes = np.concatenate([2 * nodes[inner], 2 * nodes[inner] + 1])
+
+    distance = np.where(best_triangle >= 0, best, np.inf)
+    triangle = np.where(best_triangle >= 0, bvh.order[np.maximum(best_triangle, 0)], -1)
+    return distance, triangle
+
+
+def subdivide(triangles, levels=1):
+    """Split every triangle into 4 at its edge midpoints, `levels` times"""
+    for _ in range(levels):
+        a, b, c = triangles[:, 0], triangles[:, 1], triangles[:, 2]
+        ab = (a + b) / 2
+        bc = (b + c) / 2
+        ca = (c + a) / 2
+        triangles = np.concatenate([
+            np.stack([a, ab, ca], axis=1),
+            np.stack([ab, b, bc], axis=1),
+            np.stack([ca, bc, c], axis=1),
+            np.stack([ab, bc, ca], axis=1),
+        ])
+    return triangles
+
+
+def signed_volume(triangles):
+    """Enclosed volume of a closed mesh, negative when the triangles face inward"""
+    return float(np.einsum('ij,ij->i', triangles[:, 0], np.cross(triangles[:, 1], triangles[:, 2])).sum() / 6.0)
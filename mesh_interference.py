@@ -0,0 +1,360 @@
+"""
+Offline interference screening on tessellated components.
+
+Reads the manifest written by nx_export_tessellation.py (one STL per prototype
+body plus the placement of every component instance), runs a NumPy narrow phase
+on the triangle meshes and labels each component pair:
+
+    apart        no triangles within the tolerance of each other
+    interfering  the meshes cross, and a vertex lies inside the other mesh by
+                 more than twice the tolerance (or one mesh contains the other)
+    ambiguous    everything in between (touching, grazing, crossing by less than
+                 the tessellation error): these go back to NX for the exact check
+
+The labels are written as a screening file that NX_Comp_touch reads through its
+screening_file setting, so only the ambiguous pairs run SimpleInterference.
+
+Usage:
+    python mesh_interference.py asm1_tessellation/manifest.json
+    python mesh_interference.py manifest.json --tolerance 0.05 --output screening.json
+    python mesh_interference.py --bench 200
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+import mesh_bvh
+
+APART = "apart"
+INTERFERING = "interfering"
+AMBIGUOUS = "ambiguous"
+
+# Triangle pairs evaluated per vectorized batch, bounds the temporary memory
+PAIR_CHUNK_SIZE = 200000
+# Deepest crossing vertices confirmed with a point-in-mesh test
+DEPTH_SAMPLES = 8
+# Ray direction of the point-in-mesh parity test, away from the coordinate axes
+PARITY_DIRECTION = np.array([0.5773, 0.5774, 0.5775]) / np.linalg.norm([0.5773, 0.5774, 0.5775])
+
+
+def _dot(a, b):
+    return np.einsum('...i,...i->...', a, b)
+
+
+def point_segment_distance(p, a, b):
+    ab = b - a
+    length2 = _dot(ab, ab)
+    t = np.clip(_dot(p - a, ab) / np.where(length2 > 0, length2, 1.0), 0.0, 1.0)
+    return np.linalg.norm(p - (a + t[..., None] * ab), axis=-1)
+
+
+def point_triangle_distance(p, a, b, c):
+    """Distance of points p to triangles (a, b, c), row-wise"""
+    e0 = b - a
+    e1 = c - a
+    w = p - a
+    d00 = _dot(e0, e0)
+    d01 = _dot(e0, e1)
+    d11 = _dot(e1, e1)
+    d20 = _dot(w, e0)
+    d21 = _dot(w, e1)
+    denom = d00 * d11 - d01 * d01
+    safe = np.where(denom > 0, denom, 1.0)
+    v = (d11 * d20 - d01 * d21) / safe
+    u = (d00 * d21 - d01 * d20) / safe
+    inside = (denom > 0) & (v >= 0) & (u >= 0) & (u + v <= 1)
+
+    normal = np.cross(e0, e1)
+    norm = np.linalg.norm(normal, axis=-1)
+    plane_distance = np.abs(_dot(w, normal)) / np.where(norm > 0, norm, 1.0)
+
+    edge_distance = np.minimum(np.minimum(point_segment_distance(p, a, b), point_segment_distance(p, b, c)),
+                               point_segment_distance(p, c, a))
+    return np.where(inside, plane_distance, edge_distance)
+
+
+def segment_segment_distance(p1, q1, p2, q2):
+    """Distance between segments p1-q1 and p2-q2, row-wise (clamped closest points)"""
+    d1 = q1 - p1
+    d2 = q2 - p2
+    r = p1 - p2
+    a = _dot(d1, d1)
+    e = _dot(d2, d2)
+    f = _dot(d2, r)
+    c = _dot(d1, r)
+    b = _dot(d1, d2)
+    denom = a * e - b * b
+
+    safe_a = np.where(a > 0, a, 1.0)
+    safe_e = np.where(e > 0, e, 1.0)
+    s = np.where(denom > 1e-12 * a * e, np.clip((b * f - c * e) / np.where(denom != 0, denom, 1.0), 0, 1), 0.0)
+    t = np.where(e > 0, (b * s + f) / safe_e, 0.0)
+
+    below = t < 0
+    above = t > 1
+    s = np.where(below, np.clip(-c / safe_a, 0, 1), np.where(above, np.clip((b - c) / safe_a, 0, 1), s))
+    s = np.where(a > 0, s, 0.0)
+    t = np.clip(t, 0, 1)
+
+    return np.linalg.norm((p1 + d1 * s[..., None]) - (p2 + d2 * t[..., None]), axis=-1)
+
+
+def segment_crosses_triangle(p, q, a, b, c, eps=1e-9):
+    """
+    True where segment p-q passes through the interior of triangle (a, b, c)
+    (Moller-Trumbore). Contacts at the segment ends or the triangle boundary are
+    not crossings, so touching meshes keep distance 0 without crossing.
+    """
+    direction = q - p
+    e1 = b - a
+    e2 = c - a
+    h = np.cross(direction, e2)
+    det = _dot(e1, h)
+    valid = np.abs(det) > eps * np.maximum(_dot(e1, e1), 1e-300)
+    inv = 1.0 / np.where(valid, det, 1.0)
+    s = p - a
+    u = inv * _dot(s, h)
+    qv = np.cross(s, e1)
+    v = inv * _dot(direction, qv)
+    t = inv * _dot(e2, qv)
+    return valid & (u > eps) & (v > eps) & (u + v < 1 - eps) & (t > eps) & (t < 1 - eps)
+
+
+def triangle_pair_distance(tri_a, tri_b):
+    """
+    Minimum distance and crossing flag of triangle pairs (n, 3, 3) each.
+    The distance is 0 where the triangles cross.
+    """
+    distance = np.full(len(tri_a), np.inf)
+    crossing = np.zeros(len(tri_a), dtype=bool)
+
+    for k in range(3):
+        distance = np.minimum(distance, point_triangle_distance(tri_a[:, k], tri_b[:, 0], tri_b[:, 1], tri_b[:, 2]))
+        distance = np.minimum(distance, point_triangle_distance(tri_b[:, k], tri_a[:, 0], tri_a[:, 1], tri_a[:, 2]))
+
+        pa, qa = tri_a[:, k], tri_a[:, (k + 1) % 3]
+        pb, qb = tri_b[:, k], tri_b[:, (k + 1) % 3]
+        crossing |= segment_crosses_triangle(pa, qa, tri_b[:, 0], tri_b[:, 1], tri_b[:, 2])
+        crossing |= segment_crosses_triangle(pb, qb, tri_a[:, 0], tri_a[:, 1], tri_a[:, 2])
+
+        for m in range(3):
+            distance = np.minimum(distance, segment_segment_distance(pa, qa, tri_b[:, m], tri_b[:, (m + 1) % 3]))
+
+    return np.where(crossing, 0.0, distance), crossing
+
+
+def point_inside_mesh(point, triangles):
+    """Parity test: a ray from point crosses a closed mesh an odd number of times from inside"""
+    e1 = triangles[:, 1] - triangles[:, 0]
+    e2 = triangles[:, 2] - triangles[:, 0]
+    h = np.cross(PARITY_DIRECTION, e2)
+    det = _dot(e1, h)
+    valid = np.abs(det) > 1e-14
+    inv = 1.0 / np.where(valid, det, 1.0)
+    s = point - triangles[:, 0]
+    u = inv * _dot(s, h)
+    qv = np.cross(s, e1)
+    v = inv * _dot(PARITY_DIRECTION, qv)
+    t = inv * _dot(e2, qv)
+    hits = valid & (u >= 0) & (v >= 0) & (u + v <= 1) & (t > 0)
+    return bool(np.count_nonzero(hits) % 2)
+
+
+def point_mesh_distance(point, triangles):
+    """Distance from one point to the closest triangle of a mesh"""
+    if not len(triangles):
+        return np.inf
+    points = np.broadcast_to(point, (len(triangles), 3))
+    return float(point_triangle_distance(points, triangles[:, 0], triangles[:, 1], triangles[:, 2]).min())
+
+
+def is_deep_inside(point, triangles, depth):
+    """Point inside a closed mesh and further than depth from its surface"""
+    return point_inside_mesh(point, triangles) and point_mesh_distance(point, triangles) > depth
+
+
+def penetrating_vertices(tri_a, tri_b, depth):
+    """
+    Vertices of tri_a lying behind the plane of the crossing triangle of tri_b by
+    more than depth (outward normals), deepest first.
+    """
+    normals = mesh_bvh.unit_normals(tri_b)
+    behind = -_dot(tri_a - tri_b[:, None, 0], normals[:, None, :])
+    vertices = tri_a.reshape(-1, 3)
+    behind = behind.reshape(-1)
+    deep = behind > depth
+    order = np.argsort(-behind[deep])
+    return vertices[deep][order]
+
+
+def screen_pair(bvh_a, bvh_b, tolerance):
+    """Label two meshes apart / interfering / ambiguous, returns (label, minimum distance)"""
+    min_a, max_a = bvh_a.bounds
+    min_b, max_b = bvh_b.bounds
+    if not mesh_bvh.boxes_overlap(min_a, max_a, min_b, max_b, tolerance):
+        return APART, None
+
+    ia, ib = mesh_bvh.candidate_triangle_pairs(bvh_a, bvh_b, tolerance)
+
+    min_distance = np.inf
+    crossing_a = []
+    crossing_b = []
+    for start in range(0, len(ia), PAIR_CHUNK_SIZE):
+        tri_a = bvh_a.triangles[ia[start:start + PAIR_CHUNK_SIZE]]
+        tri_b = bvh_b.triangles[ib[start:start + PAIR_CHUNK_SIZE]]
+        distance, crossing = triangle_pair_distance(tri_a, tri_b)
+        if len(distance):
+            min_distance = min(min_distance, float(distance.min()))
+        if crossing.any():
+            crossing_a.append(tri_a[crossing])
+            crossing_b.append(tri_b[crossing])
+
+    if crossing_a:
+        tri_a = np.concatenate(crossing_a)
+        tri_b = np.concatenate(crossing_b)
+        for vertex in penetrating_vertices(tri_a, tri_b, 2 * tolerance)[:DEPTH_SAMPLES]:
+            if is_deep_inside(vertex, bvh_b.triangles, 2 * tolerance):
+                return INTERFERING, 0.0
+        for vertex in penetrating_vertices(tri_b, tri_a, 2 * tolerance)[:DEPTH_SAMPLES]:
+            if is_deep_inside(vertex, bvh_a.triangles, 2 * tolerance):
+                return INTERFERING, 0.0
+        return AMBIGUOUS, 0.0
+
+    if min_distance <= tolerance:
+        return AMBIGUOUS, min_distance
+
+    # No surfaces close to each other: one mesh may still contain the other
+    if len(bvh_a) and len(bvh_b):
+        if point_inside_mesh(bvh_a.triangles[0, 0], bvh_b.triangles) or \
+                point_inside_mesh(bvh_b.triangles[0, 0], bvh_a.triangles):
+            return INTERFERING, 0.0
+
+    return APART, (None if np.isinf(min_distance) else min_distance)
+
+
+def load_instances(manifest_path):
+    """
+    Instances of a tessellation manifest as (key, name, triangles) with the
+    triangles of all bodies placed in assembly coordinates. Each prototype
+    mesh file is read once.
+    """
+    with open(manifest_path, 'r') as f:
+        manifest = json.load(f)
+
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    meshes = {mesh_id: mesh_bvh.read_stl(os.path.join(base_dir, file_name))
+              for mesh_id, file_name in manifest['meshes'].items()}
+
+    instances = []
+    for instance in manifest['instances']:
+        parts = [mesh_bvh.transform_triangles(meshes[mesh_id], placement['rotation'], placement['origin'])
+                 for mesh_id, placement in zip(instance['meshes'], instance['placements'])]
+        triangles = np.concatenate(parts) if parts else np.zeros((0, 3, 3))
+        instances.append((instance['key'], instance['name'], triangles))
+
+    return manifest, instances
+
+
+def screen_instances(instances, tolerance, leaf_size=8, log=None):
+    """
+    Screen all instance pairs. Returns list of dicts with key1, key2, name1,
+    name2, label and distance, for the pairs whose bounding boxes are within
+    tolerance (every other pair is apart).
+    """
+    bvhs = [mesh_bvh.BVH(triangles, leaf_size) for _, _, triangles in instances]
+    box_min = np.array([bvh.bounds[0] for bvh in bvhs]).reshape(-1, 3)
+    box_max = np.array([bvh.bounds[1] for bvh in bvhs]).reshape(-1, 3)
+
+    # Broad phase on the instance boxes, all pairs at once
+    close = mesh_bvh.boxes_overlap(box_min[:, None], box_max[:, None], box_min[None], box_max[None], tolerance)
+    first, second = np.nonzero(np.triu(close, k=1))
+
+    results = []
+    for i, j in zip(first.tolist(), second.tolist()):
+        label, distance = screen_pair(bvhs[i], bvhs[j], tolerance)
+        results.append({
+            'key1': instances[i][0],
+            'key2': instances[j][0],
+            'name1': instances[i][1],
+            'name2': instances[j][1],
+            'label': label,
+            'distance': distance
+        })
+        if log is not None:
+            log(f"{instances[i][1]} <-> {instances[j][1]}: {label}")
+
+    return results
+
+
+def write_screening_file(output_path, manifest, instances, results, tolerance):
+    """Screening file read by NX_Comp_touch (screening_file setting)"""
+    screening = {
+        'part': manifest.get('part'),
+        'tolerance': tolerance,
+        'instances': [key for key, _, _ in instances],
+        'incomplete': manifest.get('incomplete', []),
+        'pairs': results
+    }
+    with open(output_path, 'w') as f:
+        json.dump(screening, f, indent=1)
+    return output_path
+
+
+def run_benchmark(count, tolerance=0.01, segments=48, seed=0):
+    """Screen `count` random spheres and report timings and label counts"""
+    rng = np.random.default_rng(seed)
+    side = max(1, int(round(count ** (1 / 3))))
+    centers = rng.uniform(0, 2.2 * side, size=(count, 3))
+    radii = rng.uniform(0.6, 1.2, size=count)
+
+    start = time.perf_counter()
+    instances = [(f"S{k}", f"sphere{k}", mesh_bvh.sphere_mesh(radii[k], centers[k], segments)) for k in range(count)]
+    built = time.perf_counter()
+    results = screen_instances(instances, tolerance)
+    done = time.perf_counter()
+
+    labels = {label: sum(1 for r in results if r['label'] == label) for label in (APART, AMBIGUOUS, INTERFERING)}
+    triangles = sum(len(t) for _, _, t in instances)
+    print(f"{count} spheres, {triangles} triangles, {count * (count - 1) // 2} pairs")
+    print(f"  mesh generation: {built - start:.3f} s")
+    print(f"  screening:       {done - built:.3f} s ({len(results)} pairs past the broad phase)")
+    print(f"  labels: {labels}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline NumPy interference screening on tessellated components")
+    parser.add_argument('manifest', nargs='?', help="manifest.json written by nx_export_tessellation.py")
+    parser.add_argument('--tolerance', type=float, default=None,
+                        help="distance tolerance in mm (default: twice the manifest chordal tolerance)")
+    parser.add_argument('--output', default=None, help="screening file (default: screening.json next to the manifest)")
+    parser.add_argument('--leaf-size', type=int, default=8)
+    parser.add_argument('--bench', type=int, default=None, metavar='N', help="benchmark on N synthetic spheres")
+    args = parser.parse_args(argv)
+
+    if args.bench is not None:
+        run_benchmark(args.bench, args.tolerance if args.tolerance is not None else 0.01)
+        return
+
+    if args.manifest is None:
+        parser.error("a manifest or --bench is required")
+
+    manifest, instances = load_instances(args.manifest)
+    tolerance = args.tolerance if args.tolerance is not None else 2 * manifest.get('chordal_tolerance', 0.01)
+
+    start = time.perf_counter()
+    results = screen_instances(instances, tolerance, args.leaf_size)
+    elapsed = time.perf_counter() - start
+
+    output_path = args.output or os.path.join(os.path.dirname(os.path.abspath(args.manifest)), "screening.json")
+    write_screening_file(output_path, manifest, instances, results, tolerance)
+
+    labels = {label: sum(1 for r in results if r['label'] == label) for label in (APART, AMBIGUOUS, INTERFERING)}
+    print(f"Screened {len(instances)} instances in {elapsed:.2f} s: {labels}")
+    print(f"Screening written to: {output_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+"""
+Wall thickness map of tessellated bodies, for planning midsurface extraction.
+
+Reads the manifest written by SpaceClaim_ExportTessellation.py (one STL per
+solid body). For every triangle, a ray is cast from its centroid along the
+inward normal, and the nearest hit on the same body is the local wall
+thickness. All rays of a body traverse its BVH together (mesh_bvh).
+
+Per body, the area-weighted distribution gives:
+    - the dominant thickness (weighted median) and the core band of samples
+      within a factor CORE_FACTOR of it (side walls and edges fall outside),
+    - a recommended min/max thickness range for AddFacePairsByRange,
+    - a non-uniform flag when the core band is wide or covers too little area.
+
+Bodies are analysed in a process pool. The JSON report is read by
+SpaceClaim_AutoMidSurface.py to seed its retry pass.
+
+Usage:
+    python mesh_thickness.py design_tessellation/manifest.json
+    python mesh_thickness.py manifest.json --processes 8 --margin 0.1
+    python mesh_thickness.py --bench 40
+"""
+import argparse
+import concurrent.futures
+import json
+import os
+import time
+
+import numpy as np
+
+import mesh_bvh
+
+# Samples within [median / CORE_FACTOR, median * CORE_FACTOR] form the core band
+CORE_FACTOR = 3.0
+# Core band p95/p5 ratio above which a body is flagged non-uniform
+UNIFORMITY_RATIO = 1.3
+# Minimum area fraction of the core band for a body to count as uniform
+CORE_AREA_FRACTION = 0.8
+
+
+def weighted_percentiles(values, weights, percentiles):
+    """Percentiles (0-100) of values weighted by weights"""
+    order = np.argsort(values)
+    values = values[order]
+    cumulative = np.cumsum(weights[order])
+    cumulative /= cumulative[-1]
+    return np.interp(np.asarray(percentiles) / 100.0, cumulative, values)
+
+
+def triangle_thickness(triangles, leaf_size=8):
+    """
+    Local wall thickness at every triangle centroid (inf where the inward ray
+    leaves the body without a hit). Inward facing meshes are flipped first.
+    """
+    if mesh_bvh.signed_volume(triangles) < 0:
+        triangles = triangles[:, ::-1]
+
+    bvh = mesh_bvh.BVH(triangles, leaf_size)
+    lo, hi = bvh.bounds
+    t_min = 1e-9 * max(float(np.linalg.norm(hi - lo)), 1.0)
+
+    centroids = triangles.mean(axis=1)
+    inward = -mesh_bvh.unit_normals(triangles)
+    thickness, _ = mesh_bvh.ray_nearest_hits(bvh, centroids, inward, t_min)
+    return thickness
+
+
+def thickness_summary(thickness, areas, margin=0.1):
+    """
+    Area-weighted statistics of a thickness map and the recommended range.
+    Returns a dict, with None values when no ray hit anything.
+    """
+    hit = np.isfinite(thickness) & (areas > 0)
+    summary = {
+        'samples': int(len(thickness)),
+        'hit_fraction': float(areas[hit].sum() / areas.sum()) if areas.sum() > 0 else 0.0,
+        'median': None, 'p5': None, 'p95': None,
+        'core_p5': None, 'core_p95': None, 'core_fraction': 0.0,
+        'recommended_min': None, 'recommended_max': None,
+        'non_uniform': True,
+    }
+    if not hit.any():
+        return summary
+
+    values = thickness[hit]
+    weights = areas[hit]
+    p5, median, p95 = weighted_percentiles(values, weights, [5, 50, 95])
+
+    core = (values >= median / CORE_FACTOR) & (values <= median * CORE_FACTOR)
+    core_p5, core_p95 = weighted_percentiles(values[core], weights[core], [5, 95])
+    core_fraction = float(weights[core].sum() / weights.sum())
+
+    summary.update({
+        'median': float(median), 'p5': float(p5), 'p95': float(p95),
+        'core_p5': float(core_p5), 'core_p95': float(core_p95), 'core_fraction': core_fraction,
+        'recommended_min': float(core_p5 * (1 - margin)),
+        'recommended_max': float(core_p95 * (1 + margin)),
+        'non_uniform': bool(core_p95 > UNIFORMITY_RATIO * core_p5 or core_fraction < CORE_AREA_FRACTION),
+    })
+    return summary
+
+
+def analyze_triangles(triangles, margin=0.1, leaf_size=8):
+    """Thickness summary of one body given as triangles (n, 3, 3)"""
+    triangles = np.asarray(triangles, dtype=np.float64)
+    thickness = triangle_thickness(triangles, leaf_size)
+    return thickness_summary(thickness, mesh_bvh.triangle_areas(triangles), margin)
+
+
+def analyze_file(path, margin=0.1, leaf_size=8):
+    """Thickness summary of one body STL (runs in the worker processes)"""
+    return analyze_triangles(mesh_bvh.read_stl(path), margin, leaf_size)
+
+
+def analyze_bodies(jobs, processes=None, margin=0.1, leaf_size=8):
+    """
+    Analyse bodies in a process pool. jobs is a list of STL paths or triangle
+    arrays; the summaries come back in the same order.
+    """
+    if processes == 1:
+        return [analyze_file(job, margin, leaf_size) if isinstance(job, str) else
+                analyze_triangles(job, margin, leaf_size) for job in jobs]
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = [pool.submit(analyze_file if isinstance(job, str) else analyze_triangles, job, margin, leaf_size)
+                   for job in jobs]
+        return [future.result() for future in futures]
+
+
+def overall_range(summaries):
+    """Thickness range covering the core band of every uniform body"""
+    uniform = [s for s in summaries if s['median'] is not None and not s['non_uniform']]
+    if not uniform:
+        return None, None
+    return min(s['recommended_min'] for s in uniform), max(s['recommended_max'] for s in uniform)
+
+
+def write_report(output_path, bodies, summaries):
+    """JSON report: per body summary plus the overall recommended range"""
+    range_min, range_max = overall_range(summaries)
+    report = {
+        'recommended_min': range_min,
+        'recommended_max': range_max,
+        'bodies': [dict(body, **summary) for body, summary in zip(bodies, summaries)]
+    }
+    with open(output_path, 'w') as f:
+        json.dump(report, f, indent=1)
+    return output_path
+
+
+def print_report(bodies, summaries):
+    for body, s in zip(bodies, summaries):
+        label = f"{body.get('component', '')} --> {body.get('name', '')}"
+        if s['median'] is None:
+            print(f"{label}: no thickness found")
+            continue
+        flag = "  NON-UNIFORM" if s['non_uniform'] else ""
+        print(f"{label}: median {s['median']:.3f} mm, range {s['recommended_min']:.3f} - "
+              f"{s['recommended_max']:.3f} mm (core {s['core_fraction']:.0%}){flag}")
+
+    range_min, range_max = overall_range(summaries)
+    if range_min is not None:
+        print(f"\nRecommended range for uniform bodies: min_thickness = {range_min:.3f}, max_thickness = {range_max:.3f}")
+
+
+def synthetic_bodies(count, seed=0):
+    """Plates of different thickness and T-section ribs (non-uniform), in mm"""
+    rng = np.random.default_rng(seed)
+    bodies = []
+    meshes = []
+    for k in range(count):
+        if k % 2 == 0:
+            t = float(rng.uniform(1.0, 6.0))
+            triangles = mesh_bvh.subdivide(mesh_bvh.box_mesh((120.0, 80.0, t)), 3)
+            bodies.append({'name': f"plate{k}", 'component': "bench", 'expected': t})
+        else:
+            flange = float(rng.uniform(1.0, 3.0))
+            web = float(rng.uniform(3.0, 6.0))
+            profile = [(0, 0), (60, 0), (60, flange), (30 + web / 2, flange), (30 + web / 2, 40),
+                       (30 - web / 2, 40), (30 - web / 2, flange), (0, flange)]
+            triangles = mesh_bvh.subdivide(mesh_bvh.extrude_polygon(profile, 100.0, 8), 2)
+            bodies.append({'name': f"rib{k}", 'component': "bench", 'expected': [flange, web]})
+        meshes.append(triangles)
+    return bodies, meshes
+
+
+def run_benchmark(count, processes=None):
+    bodies, meshes = synthetic_bodies(count)
+    start = time.perf_counter()
+    summaries = analyze_bodies(meshes, processes)
+    elapsed = time.perf_counter() - start
+
+    print_report(bodies, summaries)
+    print(f"\n{count} bodies, {sum(len(m) for m in meshes)} triangles in {elapsed:.2f} s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Wall thickness map of tessellated bodies")
+    parser.add_argument('manifest', nargs='?', help="manifest.json written by SpaceClaim_ExportTessellation.py")
+    parser.add_argument('--output', default=None, help="report file (default: thickness.json next to the manifest)")
+    parser.add_argument('--margin', type=float, default=0.1, help="relative margin added around the core band")
+    parser.add_argument('--processes', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--leaf-size', type=int, default=8)
+    parser.add_argument('--bench', type=int, default=None, metavar='N', help="benchmark on N synthetic plates and ribs")
+    args = parser.parse_args(argv)
+
+    if args.bench is not None:
+        run_benchmark(args.bench, args.processes)
+        return
+
+    if args.manifest is None:
+        parser.error("a manifest or --bench is required")
+
+    with open(args.manifest, 'r') as f:
+        manifest = json.load(f)
+
+    base_dir = os.path.dirname(os.path.abspath(args.manifest))
+    bodies = manifest['bodies']
+    jobs = [os.path.join(base_dir, body['file']) for body in bodies]
+
+    start = time.perf_counter()
+    summaries = analyze_bodies(jobs, args.processes, args.margin, args.leaf_size)
+    elapsed = time.perf_counter() - start
+
+    print_report(bodies, summaries)
+    output_path = args.output or os.path.join(base_dir, "thickness.json")
+    write_report(output_path, bodies, summaries)
+    print(f"\n{len(bodies)} bodies analysed in {elapsed:.2f} s, report written to: {output_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -17,6 +17,9 @@
     3. Run the script.
 """
 
+import contextlib
+import time
+
 min_thickness = 0
 max_thickness = 250
 extent_surf = True
@@ -37,21 +40,22 @@ def main():
     RootNameComp = comp.GetName()
     RootCompCount = len(comp.Components)
     print('Number of comp in design', RootNameComp, " is " , RootCompCount)
-    allSolid = comp.GetAllBodies()
-    for soli in allSolid:
-        not_active = soli.IsSuppressed
-        is_solid=soli.GetMaster().Shape.IsClosed
-        if not_active == False and is_solid == True:
-            # print(soli.IsSuppressed)
-            sel_i = Selection.Create(soli)
-            if methode_by_body==True:
-                print("Surface extraction by selecting body")
-                extract_mid_body(sel_i, min_thickness, max_thickness, extent_surf)
-            else:
-                print("Surface extraction by selecting two surface")
-                extract_mid_surf(soli)
+    with timed("Midsurface extraction"):
+        allSolid = comp.GetAllBodies()
+        for soli in allSolid:
+            not_active = soli.IsSuppressed
+            is_solid=soli.GetMaster().Shape.IsClosed
+            if not_active == False and is_solid == True:
+                # print(soli.IsSuppressed)
+                sel_i = Selection.Create(soli)
+                if methode_by_body==True:
+                    print("Surface extraction by selecting body")
+                    extract_mid_body(sel_i, min_thickness, max_thickness, extent_surf)
+                else:
+                    print("Surface extraction by selecting two surface")
+                    extract_mid_surf(soli)
      
-    rename_midsurf()
+        rename_midsurf()
             
     print("Surface extracted for these solids")      
     for soli in allSolid:
@@ -71,6 +75,17 @@ def main():
             name = soli.GetName()
             print(parentCo, "-->" ,name)
  
+@contextlib.contextmanager
+def timed(label):
+    """
+    - Prints "<label>: <seconds> s" when the block ends, also when it fails.
+    """
+    start = time.time()
+    try:
+        yield
+    finally:
+        print("%s: %.2f s" % (label, time.time() - start))
+
 def rename_midsurf():
     """
     - Iterates over all bodies.
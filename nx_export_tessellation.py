@@ -0,0 +1,218 @@
+﻿import NXOpen
+import json
+import os
+import re
+import sys
+
+import numpy as np
+
+# Analysis helpers shared with the other journals next to this file
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from NX_Comp_touch import (get_all_components, get_body_bounding_box, get_component_bodies, get_component_key,
+                           get_component_name)
+from nx_named_face_data import component_transform
+
+import mesh_bvh
+
+# Chordal and adjacency tolerance (mm) of the exported STL tessellation
+chordal_tolerance = 0.01
+
+def main():
+    theSession = NXOpen.Session.GetSession()
+    workPart = theSession.Parts.Work
+    lw = theSession.ListingWindow
+
+    lw.Open()
+    lw.WriteLine("="*80)
+    lw.WriteLine("Tessellation Export for Offline Interference Screening")
+    lw.WriteLine("="*80)
+
+    output_dir = get_output_dir(workPart)
+    manifest_path = export_tessellation(theSession, workPart, output_dir, lw)
+
+    lw.WriteLine(f"\nManifest written to: {manifest_path}")
+    lw.WriteLine(f"Screen it with: python mesh_interference.py \"{manifest_path}\"")
+
+def get_output_dir(workPart):
+    """<part>_tessellation directory next to the part, or in the temp directory"""
+    try:
+        part_path = workPart.FullPath
+        part_dir = os.path.dirname(part_path)
+        part_name = os.path.splitext(os.path.basename(part_path))[0]
+        output_dir = os.path.join(part_dir, f"{part_name}_tessellation")
+    except:
+        import tempfile
+        output_dir = os.path.join(tempfile.gettempdir(), "tessellation")
+
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+    return output_dir
+
+def export_tessellation(theSession, workPart, output_dir, lw):
+    """
+    Write one binary STL per prototype body and a manifest.json with, for every
+    component instance, the placement of each of its body meshes.
+
+    A prototype body is exported once, from its first occurrence (so in assembly
+    coordinates of that occurrence). Other instances reference the same file with
+    the placement relative to that first occurrence.
+
+    Every placed mesh is checked against the bounding box of its occurrence body.
+    An instance whose placement does not match gets its own STL, exported from
+    that occurrence.
+
+    Instances with a body whose export failed, or whose own mesh does not match
+    its bounding box either, are left out of `instances` and listed under
+    `incomplete`, so their pairs go to the exact check in NX instead of being
+    screened on a wrong or partial tessellation.
+    """
+    import NXOpen.UF
+    theUfSession = NXOpen.UF.UFSession.GetUFSession()
+
+    meshes = {}
+    mesh_ids = {}
+    mesh_frames = {}
+    mesh_points = {}
+    instances = []
+    incomplete = []
+
+    for comp in get_all_components(workPart):
+        rotation, origin = component_transform(comp)
+
+        try:
+            prototype_key = comp.Prototype.FullPath
+        except:
+            prototype_key = get_component_name(comp)
+        base_name = re.sub(r'[^A-Za-z0-9_.-]+', '_', os.path.splitext(os.path.basename(prototype_key))[0])
+
+        instance = {
+            'key': get_component_key(comp),
+            'name': get_component_name(comp),
+            'meshes': [],
+            'placements': []
+        }
+        complete = True
+
+        for index, body in enumerate(get_component_bodies(comp)):
+            body_key = (prototype_key, index)
+            occ_body = comp.FindOccurrence(body)
+            if occ_body is None:
+                occ_body = body
+
+            exported_here = body_key not in mesh_ids
+            if exported_here:
+                mesh_id = f"{base_name}_{index}_{len(meshes)}"
+                if export_mesh(theSession, occ_body, output_dir, mesh_id, meshes, lw):
+                    mesh_ids[body_key] = mesh_id
+                    mesh_frames[mesh_id] = (rotation, origin)
+                else:
+                    lw.WriteLine(f"  Export failed for {instance['name']} body {index}")
+                    mesh_ids[body_key] = None
+
+            mesh_id = mesh_ids[body_key]
+            if mesh_id is None:
+                complete = False
+                continue
+
+            # Placement relative to the occurrence the mesh was exported from
+            frame_rotation, frame_origin = mesh_frames[mesh_id]
+            relative_rotation = rotation @ frame_rotation.T
+            relative_origin = origin - relative_rotation @ frame_origin
+
+            body_box = get_body_bounding_box(theUfSession, occ_body)
+            if not placement_matches(mesh_points, output_dir, meshes[mesh_id], relative_rotation, relative_origin, body_box):
+                # Re-export from this occurrence, unless the mesh already comes from it
+                own_id = None
+                if not exported_here:
+                    own_id = f"{base_name}_{index}_{len(meshes)}"
+                    if not export_mesh(theSession, occ_body, output_dir, own_id, meshes, lw):
+                        own_id = None
+
+                if own_id is None or not placement_matches(mesh_points, output_dir, meshes[own_id],
+                                                           np.eye(3), np.zeros(3), body_box):
+                    lw.WriteLine(f"  Mesh of {instance['name']} body {index} does not match its bounding box")
+                    complete = False
+                    continue
+
+                lw.WriteLine(f"  Placement of {instance['name']} body {index} did not match, exported its own mesh")
+                mesh_frames[own_id] = (rotation, origin)
+                mesh_id = own_id
+                relative_rotation = np.eye(3)
+                relative_origin = np.zeros(3)
+
+            instance['meshes'].append(mesh_id)
+            instance['placements'].append({
+                'rotation': relative_rotation.tolist(),
+                'origin': relative_origin.tolist()
+            })
+
+        if complete:
+            instances.append(instance)
+        else:
+            incomplete.append(instance['key'])
+
+    manifest = {
+        'part': workPart.FullPath,
+        'chordal_tolerance': chordal_tolerance,
+        'meshes': meshes,
+        'instances': instances,
+        'incomplete': incomplete
+    }
+
+    manifest_path = os.path.join(output_dir, "manifest.json")
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=1)
+
+    lw.WriteLine(f"\n{len(meshes)} mesh(es) for {len(instances)} component instance(s)")
+    if incomplete:
+        lw.WriteLine(f"{len(incomplete)} instance(s) left out after a failed export, NX checks their pairs exactly")
+    return manifest_path
+
+def export_mesh(theSession, occ_body, output_dir, mesh_id, meshes, lw):
+    """Export occ_body as <mesh_id>.stl and add it to meshes. Returns True on success."""
+    file_name = f"{mesh_id}.stl"
+    try:
+        export_body_stl(theSession, occ_body, os.path.join(output_dir, file_name))
+    except Exception as e:
+        lw.WriteLine(f"  {file_name}: {e}")
+        return False
+
+    lw.WriteLine(f"  Exported {file_name}")
+    meshes[mesh_id] = file_name
+    return True
+
+def placement_matches(mesh_points, output_dir, file_name, rotation, origin, body_box):
+    """
+    True if the mesh in file_name, placed with rotation and origin, has the
+    bounding box [xmin, ymin, zmin, xmax, ymax, zmax] of the occurrence body
+    within max(10 * chordal_tolerance, 1% of the box diagonal). Mesh vertices
+    are read once per file and cached in mesh_points.
+    """
+    if file_name not in mesh_points:
+        triangles = mesh_bvh.read_stl(os.path.join(output_dir, file_name))
+        mesh_points[file_name] = np.unique(triangles.reshape(-1, 3), axis=0)
+
+    points = mesh_points[file_name] @ np.asarray(rotation).T + np.asarray(origin)
+    if len(points) == 0:
+        return False
+
+    placed_box = np.concatenate([points.min(axis=0), points.max(axis=0)])
+    body_box = np.asarray(body_box, dtype=np.float64)
+    tolerance = max(10 * chordal_tolerance, 0.01 * np.linalg.norm(body_box[3:] - body_box[:3]))
+    return bool(np.all(np.abs(placed_box - body_box) <= tolerance))
+
+def export_body_stl(theSession, body, output_path):
+    """Export a single body as binary STL"""
+    stlCreator = theSession.DexManager.CreateStlCreator()
+    try:
+        stlCreator.AutoNormalGen = True
+        stlCreator.ChordalTol = chordal_tolerance
+        stlCreator.AdjacencyTol = chordal_tolerance
+        stlCreator.OutputFile = output_path
+        stlCreator.ExportSelectionBlock.Add(body)
+        stlCreator.Commit()
+    finally:
+        stlCreator.Destroy()
+
+if __name__ == '__main__':
+    main()
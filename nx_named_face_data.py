@@ -1,13 +1,50 @@
 ﻿import NXOpen
-import NXOpen.UF
 import math
 import os
+import sys
+from array import array
+import numpy as np
+
+# NX face types returned by UF Modeling.AskFaceData
+FACE_TYPE_CYLINDER = 16
+FACE_TYPE_PLANE = 22
+
+# Relative tolerance of the closed cylinder test (area against 2*pi*r*L)
+closed_cyl_rtol = 1e-3
+# Grouping tolerances: unit vector components, and lengths/radii in mm
+direction_tol = 1e-4
+length_tol = 1e-3
+
+# Sort the output rows by face name; False keeps the selection order
+sort_by_name = True
+# Rows sent to the listing window per WriteLine call
+listing_chunk_size = 1000
+
+# Largest distance (mm) between the placed prototype COG and the COG measured on
+# the occurrence for a component placement to be trusted
+placement_check_tol = 0.01
+
+# SQLite file of results_store.py: the face table is also stored there when set
+results_db = None
 
 
 def main():
     the_session = NXOpen.Session.GetSession()
-    the_uf_session = NXOpen.UF.UFSession.GetUFSession()
     work_part = the_session.Parts.Work
+    
+    # Selection Setup
+    resp, my_selected_objects = select_objects("Select multiple faces")
+    
+    if resp == NXOpen.Selection.Response.Ok:
+        analyze_faces(the_session, work_part, my_selected_objects)
+
+def analyze_faces(the_session, work_part, objects):
+    """
+    Measure and classify the faces among objects, write the table to the listing
+    window and to a text file next to the part. Returns the output file path.
+    """
+    import NXOpen.UF
+    the_uf_session = NXOpen.UF.UFSession.GetUFSession()
     lw = the_session.ListingWindow
     
     lw.Open()
@@ -15,101 +52,357 @@ def main():
     # Unit for centerline measurement
     unit_mm = work_part.UnitCollection.FindObject("MilliMeter")
     
-    # Selection Setup
-    resp, my_selected_objects = select_objects("Select multiple faces")
+    # First pass: measure each prototype face once. Faces of repeated component
+    # instances share their prototype measurement and only differ by placement.
+    # The placement of every component is checked once against a direct
+    # measurement of its first occurrence face; the faces of a component that
+    # fails the check are measured directly on the occurrence.
+    face_names = []
+    measured_rows = array('q')
+    transform_rows = array('q')
     
-    if resp == NXOpen.Selection.Response.Ok:
-        # First pass: collect all face data
-        face_data_list = []
+    prototype_rows = {}
+    prototypes = FaceTable()
+    transform_ids = {}
+    transforms = [identity_transform()]
+    
+    def measured_row(face):
+        """Row of face in prototypes, measuring it on first use"""
+        tag = face.Tag
+        if tag not in prototype_rows:
+            prototype_rows[tag] = measure_face(the_session, the_uf_session, face, unit_mm, prototypes)
+        return prototype_rows[tag]
+    
+    for obj in objects:
+        if not isinstance(obj, NXOpen.Face):
+            continue
         
-        for obj in my_selected_objects:
-            if not isinstance(obj, NXOpen.Face):
-                continue
-            
-            face = obj
-            
-            # Get original face name
-            original_name = face.Name if face.Name else "No_Name"
-            
-            # 1. Get Face Physical Properties
-            area, perimeter, rad_dia, cog, min_rad, area_err, anchor, is_approx = \
-                the_session.Measurement.GetFaceProperties([face], 0.99, NXOpen.Measurement.AlternateFace.Radius, True)
-            
-            # 2. Get Centerline Properties
-            pd_length, pvug_curves, start_pt, end_pt = the_session.Measurement.GetCenterlineProperties([face], unit_mm)
-            
-            # 3. Get Underlying Face Geometry Data
-            f_type, f_pt, f_dir, bbox, f_radius, f_rad_data, norm_dir = the_uf_session.Modeling.AskFaceData(face.Tag)
+        face = obj
+        
+        # Get original face name
+        face_names.append(face.Name if face.Name else "No_Name")
+        
+        # Resolve occurrence faces to their prototype and component placement
+        component = None
+        if face.IsOccurrence:
+            component = face.OwningComponent
+            key = component.Tag
             
-            # 4. "Closed Cylinder" Logic
-            close_cyl = "0"
-            if f_type == 16: 
-                expected_area = 2 * math.pi * f_radius * pd_length
-                if round(area, 1) == round(expected_area, 1):
-                    close_cyl = "1"
+            if key not in transform_ids:
+                prototype_row = measured_row(face.Prototype)
+                transform = component_transform(component)
+                
+                if placement_matches(the_session, the_uf_session, face, unit_mm, prototypes, prototype_row, transform):
+                    transform_ids[key] = len(transforms)
+                    transforms.append(transform)
+                else:
+                    transform_ids[key] = None
+                    lw.WriteLine(f"Placement of {component.DisplayName} does not match a direct measurement, "
+                                 f"its faces are measured on the occurrence")
             
-            # Store all data
-            face_data_list.append({
-                'original_name': original_name,
-                'area': area,
-                'f_radius': f_radius,
-                'perimeter': perimeter,
-                'cog': cog,
-                'f_dir': f_dir,
-                'f_type': f_type,
-                'close_cyl': close_cyl
-            })
-        
-        # Sort by name
-        face_data_list.sort(key=lambda x: x['original_name'])
+            if transform_ids[key] is not None:
+                face = face.Prototype
+            else:
+                component = None
         
-        # Count occurrences of each name
-        name_counts = {}
-        for data in face_data_list:
-            name = data['original_name']
-            name_counts[name] = name_counts.get(name, 0) + 1
+        measured_rows.append(measured_row(face))
+        transform_rows.append(0 if component is None else transform_ids[component.Tag])
+    
+    # 4. Expand prototype measurements to all faces and place them in the assembly
+    faces = prototypes.take(np.array(measured_rows, dtype=np.int64))
+    
+    transform_rows = np.array(transform_rows, dtype=np.int64)
+    rotation = np.array([r for r, _ in transforms], dtype=np.float64)[transform_rows]
+    origin = np.array([t for _, t in transforms], dtype=np.float64)[transform_rows]
+    faces.place(rotation, origin)
+    
+    # 5. Classify all faces in one vectorized pass
+    close_cyl, groups = classify_faces(faces.f_type, faces.area, faces.f_radius, faces.pd_length, faces.f_pt, faces.f_dir)
+    
+    # Number duplicate names in one pass, sorting only the distinct names
+    order, display_names = number_duplicate_names(face_names, sort_by_name)
+    
+    # Header formatting
+    header = "{:<25} {:<5} {:<25} {:<25} {:<25} {:<25} {:<25} {:<25} {:<25} {:<25} {:<25} {:<25} {:<25} {:<25}".format(
+        "#Label", " ", "Area", "Rad", "Peri", "X_0", "Y_0", "Z_0", "i", "j", "k", "Type", "ClosedCyl", "Group"
+    )
+    
+    # Format all rows at once from plain Python columns
+    output_rows = [header]
+    output_rows.extend(format_rows(
+        display_names,
+        faces.area[order], faces.f_radius[order], faces.perimeter[order],
+        faces.cog[order], faces.f_dir[order], faces.f_type[order],
+        np.where(close_cyl[order], "1", "0"), [groups[k] for k in order]))
+    
+    write_listing(lw, output_rows)
+    
+    # Write to text file
+    output_path = write_output_file(output_rows, work_part)
+    lw.WriteLine("\n" + "="*50)
+    lw.WriteLine(f"Output saved to: {output_path}")
+    
+    if results_db is not None:
+        store_faces(work_part, display_names, faces, order, close_cyl, groups)
+        lw.WriteLine(f"Faces stored in: {results_db}")
+    return output_path
+
+def measure_face(the_session, the_uf_session, face, unit_mm, table):
+    """
+    Measure area, perimeter, COG, centerline length and geometry data of one face
+    into a new row of table. Returns the row index.
+    """
+    # 1. Get Face Physical Properties
+    area, perimeter, rad_dia, cog, min_rad, area_err, anchor, is_approx = \
+        the_session.Measurement.GetFaceProperties([face], 0.99, NXOpen.Measurement.AlternateFace.Radius, True)
+    
+    # 2. Get Centerline Properties
+    pd_length, pvug_curves, start_pt, end_pt = the_session.Measurement.GetCenterlineProperties([face], unit_mm)
+    
+    # 3. Get Underlying Face Geometry Data
+    f_type, f_pt, f_dir, bbox, f_radius, f_rad_data, norm_dir = the_uf_session.Modeling.AskFaceData(face.Tag)
+    
+    return table.append(f_type, area, f_radius, perimeter, pd_length, (cog.X, cog.Y, cog.Z), f_pt, f_dir)
+
+class FaceTable:
+    """
+    Face measurements in column arrays, one row per face: int64 face type,
+    float64 scalars and (n, 3) float64 points and directions. Rows are appended
+    into preallocated arrays that double in size when full.
+    """
+    __slots__ = ('count', 'f_type', 'area', 'f_radius', 'perimeter', 'pd_length', 'cog', 'f_pt', 'f_dir')
+
+    SCALARS = ('area', 'f_radius', 'perimeter', 'pd_length')
+    VECTORS = ('cog', 'f_pt', 'f_dir')
+
+    def __init__(self, capacity=256):
+        self.count = 0
+        self.f_type = np.zeros(capacity, dtype=np.int64)
+        for name in self.SCALARS:
+            setattr(self, name, np.zeros(capacity, dtype=np.float64))
+        for name in self.VECTORS:
+            setattr(self, name, np.zeros((capacity, 3), dtype=np.float64))
+
+    def __len__(self):
+        return self.count
+
+    def append(self, f_type, area, f_radius, perimeter, pd_length, cog, f_pt, f_dir):
+        """Add one face, returns its row index"""
+        row = self.count
+        if row == len(self.f_type):
+            self._resize(max(2 * row, 16))
         
-        # Second pass: assign numbered names
-        name_counter = {}
-        output_rows = []
+        self.f_type[row] = f_type
+        self.area[row] = area
+        self.f_radius[row] = f_radius
+        self.perimeter[row] = perimeter
+        self.pd_length[row] = pd_length
+        self.cog[row] = cog
+        self.f_pt[row] = f_pt
+        self.f_dir[row] = f_dir
+        self.count += 1
+        return row
+
+    def take(self, rows):
+        """New table with the given rows, in that order"""
+        table = FaceTable(0)
+        table.count = len(rows)
+        for name in self.__slots__[1:]:
+            setattr(table, name, getattr(self, name)[:self.count][rows])
+        return table
+
+    def place(self, rotation, origin):
+        """Map points and directions by per-row rotations (n, 3, 3) and origins (n, 3)"""
+        self.cog = origin + np.einsum('nij,nj->ni', rotation, self.cog)
+        self.f_pt = origin + np.einsum('nij,nj->ni', rotation, self.f_pt)
+        self.f_dir = np.einsum('nij,nj->ni', rotation, self.f_dir)
+
+    def _resize(self, capacity):
+        for name in self.__slots__[1:]:
+            column = getattr(self, name)
+            grown = np.zeros((capacity,) + column.shape[1:], dtype=column.dtype)
+            grown[:self.count] = column[:self.count]
+            setattr(self, name, grown)
+
+def placement_matches(the_session, the_uf_session, occurrence_face, unit_mm, prototypes, prototype_row, transform):
+    """
+    True if the prototype measurement of a face, placed with transform, matches
+    the COG and direction measured directly on its occurrence face.
+    """
+    check = FaceTable(1)
+    measure_face(the_session, the_uf_session, occurrence_face, unit_mm, check)
+    
+    rotation, origin = transform
+    placed_cog = origin + rotation @ prototypes.cog[prototype_row]
+    placed_dir = unit_vectors((rotation @ prototypes.f_dir[prototype_row])[None])[0]
+    measured_dir = unit_vectors(check.f_dir[:1])[0]
+    
+    cog_matches = np.linalg.norm(placed_cog - check.cog[0]) <= placement_check_tol
+    # Direction sign conventions may differ between occurrence and prototype
+    dir_matches = abs(abs(float(placed_dir @ measured_dir)) - 1.0) <= direction_tol or not measured_dir.any()
+    return bool(cog_matches and dir_matches)
+
+def identity_transform():
+    """Rotation matrix and origin of a placement that leaves coordinates unchanged"""
+    return np.eye(3), np.zeros(3)
+
+def component_transform(component):
+    """
+    Rotation matrix (columns are the component X, Y, Z axes) and origin that map
+    prototype coordinates into the displayed assembly, composed up the parent chain.
+    """
+    rotation, origin = identity_transform()
+    
+    while component is not None:
+        try:
+            position, orientation = component.GetPosition()
+        except:
+            break
         
-        # Header formatting
-        header = "{:<25} {:<5} {:<25} {:<25} {:<25} {:<25} {:<25} {:<25} {:<25} {:<25} {:<25} {:<25} {:<25}".format(
-            "#Label", " ", "Area", "Rad", "Peri", "X_0", "Y_0", "Z_0", "i", "j", "k", "Type", "ClosedCyl"
-        )
-        lw.WriteLine(header)
-        output_rows.append(header)
+        local_rotation = np.array([
+            [orientation.Xx, orientation.Yx, orientation.Zx],
+            [orientation.Xy, orientation.Yy, orientation.Zy],
+            [orientation.Xz, orientation.Yz, orientation.Zz],
+        ])
+        local_origin = np.array([position.X, position.Y, position.Z])
         
-        for data in face_data_list:
-            original_name = data['original_name']
-            
-            # If name appears more than once, add numbering to ALL occurrences
-            if name_counts[original_name] > 1:
-                if original_name not in name_counter:
-                    name_counter[original_name] = 1
-                else:
-                    name_counter[original_name] += 1
-                display_name = f"{original_name}{name_counter[original_name]}"
+        rotation = local_rotation @ rotation
+        origin = local_rotation @ origin + local_origin
+        component = component.Parent
+    
+    return rotation, origin
+
+def number_duplicate_names(names, sort=True):
+    """
+    Group faces by name in a single pass (stable, in order of appearance) and
+    number names that occur more than once: ALL occurrences get a 1-based suffix.
+    Only the distinct names are sorted when sort is True.
+    
+    Returns:
+        order: face indices in output order
+        display_names: numbered names, aligned with order
+    """
+    name_groups = {}
+    for index, name in enumerate(names):
+        name_groups.setdefault(name, []).append(index)
+    
+    order = []
+    display_names = []
+    if sort:
+        for name in sorted(name_groups):
+            indices = name_groups[name]
+            order.extend(indices)
+            if len(indices) > 1:
+                display_names.extend(f"{name}{n}" for n in range(1, len(indices) + 1))
             else:
-                # Name appears only once, no numbering needed
-                display_name = original_name
-            
-            # Format output row
-            res_row = "{:<25} :: {:<25.4f} {:<25.4f} {:<25.4f} {:<25.4f} {:<25.4f} {:<25.4f} {:<25.4f} {:<25.4f} {:<25.4f} {:<25} {:<25}".format(
-                display_name,
-                data['area'], data['f_radius'], data['perimeter'], 
-                data['cog'].X, data['cog'].Y, data['cog'].Z,
-                data['f_dir'][0], data['f_dir'][1], data['f_dir'][2],
-                data['f_type'], data['close_cyl']
-            )
-            
-            lw.WriteLine(res_row)
-            output_rows.append(res_row)
-        
-        # Write to text file
-        output_path = write_output_file(output_rows, work_part)
-        lw.WriteLine("\n" + "="*50)
-        lw.WriteLine(f"Output saved to: {output_path}")
+                display_names.append(name)
+    else:
+        counters = {}
+        for index, name in enumerate(names):
+            order.append(index)
+            if len(name_groups[name]) > 1:
+                counters[name] = counters.get(name, 0) + 1
+                display_names.append(f"{name}{counters[name]}")
+            else:
+                display_names.append(name)
+    
+    return order, display_names
+
+def format_rows(display_names, area, radius, perimeter, cog, direction, f_type, close_cyl, groups):
+    """Format output rows in bulk; array arguments are converted to Python lists first"""
+    row_format = "{:<25} :: {:<25.4f} {:<25.4f} {:<25.4f} {:<25.4f} {:<25.4f} {:<25.4f} {:<25.4f} {:<25.4f} {:<25.4f} {:<25} {:<25} {:<25}".format
+    cog = np.asarray(cog).T.tolist()
+    direction = np.asarray(direction).T.tolist()
+    return list(map(
+        row_format,
+        display_names,
+        np.asarray(area).tolist(), np.asarray(radius).tolist(), np.asarray(perimeter).tolist(),
+        cog[0], cog[1], cog[2],
+        direction[0], direction[1], direction[2],
+        np.asarray(f_type).tolist(), np.asarray(close_cyl).tolist(), list(groups)))
+
+def write_listing(lw, rows):
+    """Write rows to the listing window, several rows per call"""
+    for start in range(0, len(rows), listing_chunk_size):
+        lw.WriteLine("\n".join(rows[start:start + listing_chunk_size]))
+
+def classify_faces(f_type, area, radius, length, point, direction):
+    """
+    Classify all faces at once from their measured attributes (1-D arrays, and
+    (n, 3) arrays for the face point and direction from AskFaceData).
+    
+    Returns:
+        close_cyl: bool array, cylinders whose area matches 2*pi*r*L within closed_cyl_rtol
+        groups: list of labels, "P<n>" for planar faces sharing a normal,
+                "C<n>" for cylinders sharing axis and radius, "-" otherwise
+    """
+    is_cyl = f_type == FACE_TYPE_CYLINDER
+    is_plane = f_type == FACE_TYPE_PLANE
+    
+    expected_area = 2 * math.pi * radius * length
+    close_cyl = is_cyl & np.isclose(area, expected_area, rtol=closed_cyl_rtol, atol=0.0)
+    
+    groups = np.full(len(f_type), "-", dtype=object)
+    
+    # Planar faces grouped by their normal
+    if is_plane.any():
+        normal = unit_vectors(direction[is_plane])
+        groups[is_plane] = group_labels("P", np.round(normal / direction_tol))
+    
+    # Cylinders grouped by axis line and radius; the axis direction sign is
+    # arbitrary, and the axis point is moved to its foot from the origin
+    if is_cyl.any():
+        axis = canonical_directions(unit_vectors(direction[is_cyl]))
+        foot = point[is_cyl] - np.einsum('ij,ij->i', point[is_cyl], axis)[:, None] * axis
+        keys = np.hstack([
+            np.round(axis / direction_tol),
+            np.round(foot / length_tol),
+            np.round(radius[is_cyl] / length_tol)[:, None],
+        ])
+        groups[is_cyl] = group_labels("C", keys)
+    
+    return close_cyl, groups.tolist()
+
+def unit_vectors(vectors):
+    """Normalize the rows of an (n, 3) array"""
+    norms = np.linalg.norm(vectors, axis=1)
+    norms[norms == 0] = 1.0
+    return vectors / norms[:, None]
+
+def canonical_directions(vectors):
+    """Flip rows so that the first non-zero component is positive"""
+    significant = np.abs(vectors) > direction_tol
+    first = np.argmax(significant, axis=1)
+    signs = np.sign(vectors[np.arange(len(vectors)), first])
+    signs[signs == 0] = 1.0
+    return vectors * signs[:, None]
+
+def group_labels(prefix, keys):
+    """Label rows of equal keys with the same "<prefix><n>", numbered from 1"""
+    _, inverse = np.unique(keys, axis=0, return_inverse=True)
+    return np.array([f"{prefix}{n + 1}" for n in inverse.ravel()], dtype=object)
+
+def store_faces(work_part, display_names, faces, order, close_cyl, groups):
+    """Store the face table, in output order, as one run in the results_db SQLite file"""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    if script_dir not in sys.path:
+        sys.path.insert(0, script_dir)
+    import results_store
+    
+    try:
+        part = work_part.FullPath
+    except:
+        part = work_part.Leaf
+    
+    cog = faces.cog[order].tolist()
+    direction = faces.f_dir[order].tolist()
+    rows = zip(
+        display_names, faces.f_type[order].tolist(), faces.area[order].tolist(),
+        faces.f_radius[order].tolist(), faces.perimeter[order].tolist(),
+        (p[0] for p in cog), (p[1] for p in cog), (p[2] for p in cog),
+        (d[0] for d in direction), (d[1] for d in direction), (d[2] for d in direction),
+        close_cyl[order].astype(int).tolist(), [groups[k] for k in order])
+    results_store.record_run(results_db, 'faces', part, results_store.insert_faces, rows)
 
 def write_output_file(rows, work_part):
     """Write the output to a text file in the same directory as the part"""
@@ -125,8 +418,7 @@ def write_output_file(rows, work_part):
         
         # Write to file
         with open(output_path, 'w') as f:
-            for row in rows:
-                f.write(row + "\n")
+            f.write("\n".join(rows) + "\n")
         
         return output_path
     except Exception as e:
@@ -135,8 +427,7 @@ def write_output_file(rows, work_part):
         output_path = os.path.join(tempfile.gettempdir(), "face_analysis_output.txt")
         
         with open(output_path, 'w') as f:
-            for row in rows:
-                f.write(row + "\n")
+            f.write("\n".join(rows) + "\n")
         
         return output_path
 
@@ -0,0 +1,317 @@
+﻿"""
+Persistent NX worker: keeps one NX session and the recently used parts loaded
+and runs analysis jobs sent over a local socket, so automated runs do not pay
+the batch startup and part load cost every time.
+
+Start the worker inside NX (batch or interactive):
+    run_journal nx_worker.py -args serve --port 5055 --max-parts 4
+
+Submit jobs from any Python:
+    python nx_worker.py submit touch C:/work/asm1.prt C:/work/asm2.prt
+    python nx_worker.py submit faces C:/work/bracket.prt
+    python nx_worker.py submit touch C:/work/asm1.prt --option clearance=0.5
+    python nx_worker.py submit shutdown
+
+Protocol: one JSON object per line in each direction.
+    request:  {"job": "touch" | "faces" | "ping" | "shutdown", "part": path, "options": {...}}
+    response: {"ok": true, "result": ..., "seconds": float} or {"ok": false, "error": str}
+Options override the module settings listed in JOB_OPTIONS for the job type;
+a request with any other option is rejected before it is queued.
+
+Connections are served on background threads, but every job is queued and run
+on the main thread, one at a time, because the NX API is not thread safe.
+"""
+import argparse
+import collections
+import contextlib
+import json
+import os
+import queue
+import socket
+import socketserver
+import sys
+import threading
+import time
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 5055
+DEFAULT_MAX_PARTS = 4
+
+JOB_TYPES = ('touch', 'faces', 'ping', 'shutdown')
+# Job types that run on a part
+PART_JOBS = ('touch', 'faces')
+# Module settings a request may override, per job type
+JOB_OPTIONS = {
+    'touch': ('clearance', 'time_budget', 'resume', 'screening_file', 'results_db'),
+    'faces': ('closed_cyl_rtol', 'direction_tol', 'length_tol', 'sort_by_name', 'listing_chunk_size',
+              'placement_check_tol', 'results_db'),
+}
+
+
+class PartCache:
+    """
+    Loaded parts by full path, least recently used first. Opening a part beyond
+    max_parts closes the least recently used one through the backend.
+    """
+    __slots__ = ('backend', 'max_parts', '_parts')
+
+    def __init__(self, backend, max_parts=DEFAULT_MAX_PARTS):
+        self.backend = backend
+        self.max_parts = max_parts
+        self._parts = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._parts)
+
+    def __contains__(self, path):
+        return os.path.normcase(os.path.abspath(path)) in self._parts
+
+    def get(self, path):
+        """Loaded part for path, opening it (and evicting the LRU part) if needed"""
+        key = os.path.normcase(os.path.abspath(path))
+        if key in self._parts:
+            self._parts.move_to_end(key)
+            return self._parts[key]
+
+        part = self.backend.open_part(path)
+        self._parts[key] = part
+
+        while len(self._parts) > self.max_parts:
+            _, old_part = self._parts.popitem(last=False)
+            self.backend.close_part(old_part)
+
+        return part
+
+    def clear(self):
+        """Close all cached parts"""
+        while self._parts:
+            _, part = self._parts.popitem(last=False)
+            self.backend.close_part(part)
+
+
+class NXSessionBackend:
+    """
+    Runs jobs in the NX session the worker journal was started in. NXOpen and the
+    analysis journals are imported here so the client side needs neither.
+    """
+
+    def __init__(self):
+        import NXOpen
+        self.NXOpen = NXOpen
+        self.session = NXOpen.Session.GetSession()
+
+    def open_part(self, path):
+        part, load_status = self.session.Parts.OpenBaseDisplay(path)
+        load_status.Dispose()
+        return part
+
+    def close_part(self, part):
+        try:
+            part.Close(self.NXOpen.BasePart.CloseWholeTree.TrueValue,
+                       self.NXOpen.BasePart.CloseModified.CloseModified, None)
+        except:
+            pass
+
+    def activate(self, part):
+        """Make part the display and work part"""
+        if self.session.Parts.Display is not part:
+            status, load_status = self.session.Parts.SetDisplay(part, False, True)
+            load_status.Dispose()
+        if self.session.Parts.Work is not part:
+            self.session.Parts.SetWork(part)
+
+    def run(self, job, part):
+        """Run a touch check or face census on part, returns the output file path"""
+        self.activate(part)
+        options = job.get('options', {})
+
+        if job['job'] == 'touch':
+            import NX_Comp_touch
+            with module_options(NX_Comp_touch, options, JOB_OPTIONS['touch']):
+                return NX_Comp_touch.main()
+
+        if job['job'] == 'faces':
+            import nx_named_face_data
+            with module_options(nx_named_face_data, options, JOB_OPTIONS['faces']):
+                faces = [face for body in part.Bodies for face in body.GetFaces()]
+                return nx_named_face_data.analyze_faces(self.session, part, faces)
+
+        raise ValueError(f"Unknown job type: {job['job']}")
+
+
+@contextlib.contextmanager
+def module_options(module, options, allowed):
+    """Temporarily override the module level settings named in allowed (e.g. clearance, time_budget)"""
+    saved = {}
+    try:
+        for name, value in options.items():
+            if name not in allowed or not hasattr(module, name):
+                raise ValueError(f"Unknown option for {module.__name__}: {name}")
+            saved[name] = getattr(module, name)
+            setattr(module, name, value)
+        yield module
+    finally:
+        for name, value in saved.items():
+            setattr(module, name, value)
+
+
+class JobRequestHandler(socketserver.StreamRequestHandler):
+    """Reads JSON job lines, queues them and writes back one response per job"""
+
+    def handle(self):
+        for line in self.rfile:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                job = json.loads(line.decode('utf-8'))
+                check_job(job)
+            except ValueError as e:
+                response = {'ok': False, 'error': f"Invalid request: {e}"}
+            else:
+                reply = queue.Queue(maxsize=1)
+                self.server.jobs.put((job, reply))
+                response = reply.get()
+
+            self.wfile.write((json.dumps(response) + "\n").encode('utf-8'))
+            self.wfile.flush()
+
+
+class JobServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, jobs):
+        super().__init__(address, JobRequestHandler)
+        self.jobs = jobs
+
+
+def check_job(job):
+    """Raise ValueError unless job is a well formed request"""
+    if not isinstance(job, dict):
+        raise ValueError("a request must be a JSON object")
+    if job.get('job') not in JOB_TYPES:
+        raise ValueError(f"job must be one of {', '.join(JOB_TYPES)}")
+    if job['job'] in PART_JOBS and not isinstance(job.get('part'), str):
+        raise ValueError(f"a {job['job']} job needs a part path")
+    options = job.get('options', {})
+    if not isinstance(options, dict):
+        raise ValueError("options must be a JSON object")
+    unknown = sorted(name for name in options if name not in JOB_OPTIONS.get(job['job'], ()))
+    if unknown:
+        raise ValueError(f"unknown option(s) for a {job['job']} job: {', '.join(unknown)}")
+
+
+def run_job(cache, job):
+    """Execute one job against the cached parts, returns the response dict"""
+    start = time.perf_counter()
+    try:
+        # Checked before the cache, so a bad job never opens or evicts a part
+        check_job(job)
+        if job['job'] == 'ping':
+            result = {'open_parts': len(cache)}
+        else:
+            part = cache.get(job['part'])
+            result = cache.backend.run(job, part)
+        return {'ok': True, 'result': result, 'seconds': time.perf_counter() - start}
+    except Exception as e:
+        return {'ok': False, 'error': f"{type(e).__name__}: {e}", 'seconds': time.perf_counter() - start}
+
+
+def process_jobs(cache, jobs, log=print):
+    """Run queued jobs on the calling thread until a shutdown job arrives"""
+    while True:
+        job, reply = jobs.get()
+        request = job if isinstance(job, dict) else {}
+
+        if request.get('job') == 'shutdown':
+            cache.clear()
+            reply.put({'ok': True, 'result': 'shutdown'})
+            return
+
+        response = run_job(cache, job)
+        log(f"{request.get('job')} {request.get('part', '')}: {'ok' if response['ok'] else response['error']} "
+            f"({response['seconds']:.2f} s)")
+        reply.put(response)
+
+
+def serve(backend, host=DEFAULT_HOST, port=DEFAULT_PORT, max_parts=DEFAULT_MAX_PARTS, log=print):
+    """Accept jobs on host:port and run them with backend until shutdown"""
+    jobs = queue.Queue()
+    cache = PartCache(backend, max_parts)
+    server = JobServer((host, port), jobs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    log(f"NX worker listening on {host}:{server.server_address[1]}, keeping up to {max_parts} part(s) open")
+
+    try:
+        process_jobs(cache, jobs, log)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def submit(jobs, host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=None):
+    """Send jobs to a running worker over one connection, returns the responses"""
+    responses = []
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        stream = sock.makefile('rwb')
+        for job in jobs:
+            stream.write((json.dumps(job) + "\n").encode('utf-8'))
+            stream.flush()
+            responses.append(json.loads(stream.readline().decode('utf-8')))
+    return responses
+
+
+def parse_option(text):
+    """'name=value' with value read as JSON when possible (numbers, true/false, null)"""
+    name, _, value = text.partition('=')
+    try:
+        return name, json.loads(value)
+    except ValueError:
+        return name, value
+
+
+def main(argv=None):
+    address = argparse.ArgumentParser(add_help=False)
+    address.add_argument('--host', default=DEFAULT_HOST)
+    address.add_argument('--port', type=int, default=DEFAULT_PORT)
+
+    parser = argparse.ArgumentParser(description="Persistent NX analysis worker")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = commands.add_parser('serve', parents=[address], help="run the worker (inside NX)")
+    serve_parser.add_argument('--max-parts', type=int, default=DEFAULT_MAX_PARTS)
+
+    submit_parser = commands.add_parser('submit', parents=[address], help="send jobs to a running worker")
+    submit_parser.add_argument('job', choices=JOB_TYPES)
+    submit_parser.add_argument('parts', nargs='*')
+    submit_parser.add_argument('--option', action='append', default=[], help="name=value module setting")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        # Make the analysis journals next to this file importable
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        serve(NXSessionBackend(), args.host, args.port, args.max_parts)
+        return
+
+    options = dict(parse_option(text) for text in args.option)
+    if args.parts:
+        jobs = [{'job': args.job, 'part': part, 'options': options} for part in args.parts]
+    else:
+        jobs = [{'job': args.job}]
+
+    failed = 0
+    for job, response in zip(jobs, submit(jobs, args.host, args.port)):
+        if response['ok']:
+            print(f"{job.get('part', job['job'])}: {response['result']}")
+        else:
+            failed += 1
+            print(f"{job.get('part', job['job'])}: FAILED {response['error']}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
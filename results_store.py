@@ -0,0 +1,293 @@
+"""
+SQLite store of face, interference and midsurface results across runs and parts.
+
+The NX journals write into it when their results_db setting is a database
+path (next to their usual text files); the SpaceClaim midsurface attempt logs
+are ingested with the command line below, since IronPython has no sqlite3.
+Every run is one row of `runs`, its results are inserted in bulk in the same
+transaction. Indexes cover part, face type and radius, and component pair and
+run, so the queries below stay fast across thousands of runs.
+
+Usage:
+    python results_store.py results.db runs --tool faces
+    python results_store.py results.db cylinders 4 --tolerance 0.01
+    python results_store.py results.db touching --since 2026-10-12
+    python results_store.py results.db ingest design_midsurface_attempts.csv --part design.scdoc
+    python results_store.py results.db sql "SELECT part, COUNT(*) FROM faces JOIN runs ON runs.id = run_id GROUP BY part"
+"""
+import argparse
+import csv
+import datetime
+import json
+import os
+import sqlite3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    tool TEXT NOT NULL,
+    part TEXT NOT NULL,
+    started TEXT NOT NULL,
+    options TEXT,
+    source TEXT
+);
+CREATE TABLE IF NOT EXISTS faces (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    name TEXT,
+    face_type INTEGER,
+    area REAL,
+    radius REAL,
+    perimeter REAL,
+    x REAL, y REAL, z REAL,
+    i REAL, j REAL, k REAL,
+    closed_cyl INTEGER,
+    grp TEXT
+);
+CREATE TABLE IF NOT EXISTS pairs (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    component1 TEXT NOT NULL,
+    component2 TEXT NOT NULL,
+    name1 TEXT,
+    name2 TEXT,
+    touching INTEGER,
+    distance REAL,
+    details TEXT
+);
+CREATE TABLE IF NOT EXISTS midsurface (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    component TEXT,
+    body TEXT,
+    attempt INTEGER,
+    method TEXT,
+    min_t REAL,
+    max_t REAL,
+    success INTEGER
+);
+CREATE INDEX IF NOT EXISTS runs_part ON runs(part, started);
+CREATE INDEX IF NOT EXISTS runs_source ON runs(source);
+CREATE INDEX IF NOT EXISTS faces_run ON faces(run_id);
+CREATE INDEX IF NOT EXISTS faces_type_radius ON faces(face_type, radius);
+CREATE INDEX IF NOT EXISTS pairs_run ON pairs(run_id);
+CREATE INDEX IF NOT EXISTS pairs_component_pair ON pairs(component1, component2, run_id);
+CREATE INDEX IF NOT EXISTS midsurface_run ON midsurface(run_id);
+CREATE INDEX IF NOT EXISTS midsurface_body ON midsurface(component, body);
+"""
+
+# NX face type of cylinders (UF Modeling.AskFaceData), as in nx_named_face_data
+FACE_TYPE_CYLINDER = 16
+
+
+def connect(path):
+    """Open (and create if needed) the store"""
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def now():
+    """UTC timestamp as stored in runs.started, comparable with plain dates"""
+    return datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def start_run(conn, tool, part, options=None, started=None, source=None):
+    """Insert a run row, returns its id (call inside the transaction of its results)"""
+    cursor = conn.execute(
+        "INSERT INTO runs (tool, part, started, options, source) VALUES (?, ?, ?, ?, ?)",
+        (tool, part, started or now(), json.dumps(options) if options else None, source))
+    return cursor.lastrowid
+
+
+def insert_faces(conn, run_id, rows):
+    """rows: (name, face_type, area, radius, perimeter, x, y, z, i, j, k, closed_cyl, group)"""
+    conn.executemany(
+        "INSERT INTO faces VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        ((run_id,) + tuple(row) for row in rows))
+
+
+def insert_pairs(conn, run_id, rows):
+    """
+    rows: (component1, component2, name1, name2, touching, distance, details).
+    Each pair is stored with its component keys in sorted order, so the same
+    pair matches across runs whatever the component order was.
+    """
+    conn.executemany(
+        "INSERT INTO pairs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        ((run_id,) + sorted_pair(row) for row in rows))
+
+
+def sorted_pair(row):
+    component1, component2, name1, name2 = row[:4]
+    if component2 < component1:
+        component1, component2, name1, name2 = component2, component1, name2, name1
+    return (component1, component2, name1, name2) + tuple(row[4:])
+
+
+def insert_midsurface(conn, run_id, rows):
+    """rows: (component, body, attempt, method, min_t, max_t, success)"""
+    conn.executemany(
+        "INSERT INTO midsurface VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        ((run_id,) + tuple(row) for row in rows))
+
+
+def record_run(path, tool, part, insert, rows, options=None):
+    """
+    Store one run and its result rows in a single transaction, insert being one
+    of insert_faces, insert_pairs or insert_midsurface. Returns the run id.
+    """
+    conn = connect(path)
+    try:
+        with conn:
+            run_id = start_run(conn, tool, part, options)
+            insert(conn, run_id, rows)
+        return run_id
+    finally:
+        conn.close()
+
+
+def ingest_midsurface_log(conn, log_path, part=None):
+    """
+    Ingest the attempt log of SpaceClaim_AutoMidSurface.py as one run. The log
+    is append-only, so only the rows after those already ingested from the same
+    file are inserted. Returns the number of new rows.
+    """
+    source = os.path.abspath(log_path)
+    with open(log_path, 'r', newline='') as f:
+        rows = [(row['component'], row['body'], int(row['attempt']), row['method'],
+                 float(row['min_t']) if row['min_t'] else None,
+                 float(row['max_t']) if row['max_t'] else None,
+                 int(row['success'])) for row in csv.DictReader(f)]
+
+    done = conn.execute(
+        "SELECT COUNT(*) FROM midsurface JOIN runs ON runs.id = run_id WHERE runs.source = ?",
+        (source,)).fetchone()[0]
+    rows = rows[done:]
+    if not rows:
+        return 0
+
+    if part is None:
+        part = source.rsplit("_midsurface_attempts", 1)[0]
+    with conn:
+        run_id = start_run(conn, 'midsurface', part, source=source)
+        insert_midsurface(conn, run_id, rows)
+    return len(rows)
+
+
+def latest_runs(conn, tool, part=None):
+    """Id of the most recent run of tool for every part (optionally LIKE part)"""
+    query = "SELECT MAX(id) FROM runs WHERE tool = ?"
+    params = [tool]
+    if part is not None:
+        query += " AND part LIKE ?"
+        params.append(part)
+    return [row[0] for row in conn.execute(query + " GROUP BY part", params)]
+
+
+def query_cylinders(conn, radius, tolerance=1e-3, part=None, all_runs=False):
+    """Cylindrical faces of radius +- tolerance, by default from the latest face run of each part"""
+    query = ("SELECT runs.part, runs.started, faces.name, faces.radius, faces.area, faces.closed_cyl, faces.grp "
+             "FROM faces JOIN runs ON runs.id = faces.run_id "
+             "WHERE faces.face_type = ? AND faces.radius BETWEEN ? AND ?")
+    params = [FACE_TYPE_CYLINDER, radius - tolerance, radius + tolerance]
+    if part is not None:
+        query += " AND runs.part LIKE ?"
+        params.append(part)
+    if not all_runs:
+        run_ids = latest_runs(conn, 'faces', part)
+        query += f" AND faces.run_id IN ({','.join('?' * len(run_ids))})"
+        params.extend(run_ids)
+    return conn.execute(query + " ORDER BY runs.part, faces.name", params).fetchall()
+
+
+def query_new_touching(conn, since, part=None):
+    """
+    Component pairs touching in a run started on or after since, that no run of
+    the same part found touching before it. Returns (part, component1, component2,
+    name1, name2, first touching run start).
+    """
+    query = """
+        SELECT r.part, p.component1, p.component2, p.name1, p.name2, MIN(r.started)
+        FROM pairs p JOIN runs r ON r.id = p.run_id
+        WHERE p.touching = 1 AND r.started >= :since AND (:part IS NULL OR r.part LIKE :part)
+          AND NOT EXISTS (
+            SELECT 1 FROM pairs q JOIN runs s ON s.id = q.run_id
+            WHERE q.component1 = p.component1 AND q.component2 = p.component2
+              AND q.touching = 1 AND s.part = r.part AND s.started < :since)
+        GROUP BY r.part, p.component1, p.component2
+        ORDER BY r.part, MIN(r.started)
+    """
+    return conn.execute(query, {'since': since, 'part': part}).fetchall()
+
+
+def query_runs(conn, tool=None, part=None):
+    """Runs with their number of result rows, newest first"""
+    query = """
+        SELECT runs.id, runs.tool, runs.part, runs.started,
+               (SELECT COUNT(*) FROM faces WHERE run_id = runs.id)
+             + (SELECT COUNT(*) FROM pairs WHERE run_id = runs.id)
+             + (SELECT COUNT(*) FROM midsurface WHERE run_id = runs.id)
+        FROM runs
+        WHERE (:tool IS NULL OR tool = :tool) AND (:part IS NULL OR part LIKE :part)
+        ORDER BY runs.id DESC
+    """
+    return conn.execute(query, {'tool': tool, 'part': part}).fetchall()
+
+
+def print_rows(rows, header=None):
+    if header:
+        print("\t".join(header))
+    for row in rows:
+        print("\t".join("" if value is None else str(value) for value in row))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the SQLite store of face, interference and midsurface results")
+    parser.add_argument('database', help="SQLite file (results_db setting of the journals)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    runs_parser = commands.add_parser('runs', help="list runs, newest first")
+    runs_parser.add_argument('--tool', choices=['faces', 'touch', 'clearance', 'midsurface'])
+    runs_parser.add_argument('--part', help="part path, SQL LIKE pattern")
+
+    cylinders_parser = commands.add_parser('cylinders', help="cylindrical faces of a given radius")
+    cylinders_parser.add_argument('radius', type=float, help="radius in mm")
+    cylinders_parser.add_argument('--tolerance', type=float, default=1e-3)
+    cylinders_parser.add_argument('--part', help="part path, SQL LIKE pattern")
+    cylinders_parser.add_argument('--all-runs', action='store_true', help="search every run, not only the latest per part")
+
+    touching_parser = commands.add_parser('touching', help="component pairs that started touching since a date")
+    touching_parser.add_argument('--since', required=True, help="YYYY-MM-DD[ HH:MM:SS], UTC")
+    touching_parser.add_argument('--part', help="part path, SQL LIKE pattern")
+
+    ingest_parser = commands.add_parser('ingest', help="ingest SpaceClaim midsurface attempt logs")
+    ingest_parser.add_argument('logs', nargs='+', help="<document>_midsurface_attempts.csv files")
+    ingest_parser.add_argument('--part', help="document name stored with the run (default: from the log name)")
+
+    sql_parser = commands.add_parser('sql', help="run any SQL query")
+    sql_parser.add_argument('query')
+
+    args = parser.parse_args(argv)
+    conn = connect(args.database)
+
+    try:
+        if args.command == 'runs':
+            print_rows(query_runs(conn, args.tool, args.part), ("id", "tool", "part", "started", "rows"))
+        elif args.command == 'cylinders':
+            rows = query_cylinders(conn, args.radius, args.tolerance, args.part, args.all_runs)
+            print_rows(rows, ("part", "started", "name", "radius", "area", "closed_cyl", "group"))
+        elif args.command == 'touching':
+            rows = query_new_touching(conn, args.since, args.part)
+            print_rows(rows, ("part", "component1", "component2", "name1", "name2", "first_touching"))
+        elif args.command == 'ingest':
+            for log_path in args.logs:
+                count = ingest_midsurface_log(conn, log_path, args.part)
+                print(f"{log_path}: {count} new attempt(s)")
+        elif args.command == 'sql':
+            cursor = conn.execute(args.query)
+            print_rows(cursor.fetchall(), [column[0] for column in cursor.description or ()])
+            conn.commit()
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
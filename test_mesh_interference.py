@@ -0,0 +1,100 @@
+"""
+Tests of the offline interference screening on boxes and spheres, and of how
+NX_Comp_touch applies a screening file to its component pairs.
+"""
+import itertools
+import sys
+import types
+
+import numpy as np
+import pytest
+
+sys.modules.setdefault('NXOpen', types.ModuleType('NXOpen'))
+
+import mesh_bvh
+import mesh_interference
+from NX_Comp_touch import PairTable, apply_screening
+
+TOLERANCE = 0.01
+
+
+def screen_boxes(center_a, center_b, size_a=(1.0, 1.0, 1.0), size_b=(1.0, 1.0, 1.0)):
+    bvh_a = mesh_bvh.BVH(mesh_bvh.subdivide(mesh_bvh.box_mesh(size_a, center_a), 1))
+    bvh_b = mesh_bvh.BVH(mesh_bvh.subdivide(mesh_bvh.box_mesh(size_b, center_b), 1))
+    return mesh_interference.screen_pair(bvh_a, bvh_b, TOLERANCE)
+
+
+def test_touching_boxes_are_ambiguous():
+    label, distance = screen_boxes((0.0, 0.0, 0.0), (1.0, 0.2, 0.0))
+    assert label == mesh_interference.AMBIGUOUS
+    assert distance == pytest.approx(0.0, abs=1e-9)
+
+
+def test_overlapping_boxes_interfere():
+    label, _ = screen_boxes((0.0, 0.0, 0.0), (0.5, 0.2, 0.1))
+    assert label == mesh_interference.INTERFERING
+
+
+def test_contained_box_interferes():
+    label, distance = screen_boxes((0.0, 0.0, 0.0), (0.1, 0.0, 0.0), size_b=(0.3, 0.3, 0.3))
+    assert (label, distance) == (mesh_interference.INTERFERING, 0.0)
+
+
+def test_boxes_with_a_gap_are_apart():
+    label, _ = screen_boxes((0.0, 0.0, 0.0), (2.5, 0.0, 0.0))
+    assert label == mesh_interference.APART
+
+
+
+def test_box_beside_a_diagonal_bar_is_apart():
+    # The box lies inside the bounding box of the bar, 1.5 mm from its surface
+    c = np.cos(np.pi / 4)
+    rotation = [[c, -c, 0.0], [c, c, 0.0], [0.0, 0.0, 1.0]]
+    bar = mesh_bvh.transform_triangles(mesh_bvh.box_mesh((10.0, 1.0, 1.0)), rotation, (0.0, 0.0, 0.0))
+    center = (0.5 + 1.5 + c) * np.array([c, -c, 0.0])
+    box = mesh_bvh.box_mesh(center=center)
+
+    label, _ = mesh_interference.screen_pair(mesh_bvh.BVH(bar), mesh_bvh.BVH(box), TOLERANCE)
+    assert label == mesh_interference.APART
+
+
+def test_random_spheres_have_no_false_apart():
+    rng = np.random.default_rng(1)
+    count = 30
+    centers = rng.uniform(0, 6.0, size=(count, 3))
+    radii = rng.uniform(0.6, 1.2, size=count)
+    instances = [(f"S{k}", f"sphere{k}", mesh_bvh.sphere_mesh(radii[k], centers[k], 24)) for k in range(count)]
+
+    labels = {(r['key1'], r['key2']): r['label'] for r in mesh_interference.screen_instances(instances, TOLERANCE)}
+    overlapping = 0
+    for i, j in itertools.combinations(range(count), 2):
+        # Spheres overlapping by more than the faceting error of their meshes
+        overlap = radii[i] + radii[j] - np.linalg.norm(centers[i] - centers[j])
+        if overlap > 0.02 * (radii[i] + radii[j]):
+            overlapping += 1
+            assert labels.get((f"S{i}", f"S{j}"), mesh_interference.APART) != mesh_interference.APART
+    assert overlapping > 0
+
+
+def test_apply_screening():
+    comp_keys = ["A", "B", "C", "D", "E"]
+    screening = {
+        'instances': ["A", "B", "C", "D"],
+        'incomplete': ["D"],
+        'pairs': [
+            {'key1': "A", 'key2': "B", 'label': 'interfering'},
+            {'key1': "C", 'key2': "A", 'label': 'ambiguous'},
+            {'key1': "B", 'key2': "D", 'label': 'apart'},
+        ]
+    }
+    results = PairTable()
+    pairs = [(0, 1), (0, 2), (1, 2), (1, 3), (0, 4)]
+
+    remaining = apply_screening(pairs, comp_keys, screening, results)
+
+    # Ambiguous, incomplete (D) and untessellated (E) pairs go to the exact check
+    assert remaining == [(0, 2), (1, 3), (0, 4)]
+    decided = {(results.index1[row], results.index2[row]): results.is_touching(row) for row in range(len(results))}
+    # B-C is missing from the screening file: its boxes were apart
+    assert decided == {(0, 1): True, (1, 2): False}
+    assert results.method_count(PairTable.SCREENED) == 2
@@ -0,0 +1,59 @@
+"""
+Tests of the thickness analysis on the synthetic plates and T-section ribs of
+the benchmark, whose thickness is known.
+"""
+import pytest
+
+import mesh_bvh
+import mesh_thickness
+
+
+@pytest.fixture(scope='module')
+def analysed():
+    """Synthetic bodies and meshes with their serial summaries"""
+    bodies, meshes = mesh_thickness.synthetic_bodies(6)
+    return bodies, meshes, mesh_thickness.analyze_bodies(meshes, processes=1)
+
+
+def plates(analysed):
+    bodies, _, summaries = analysed
+    return [(body, summary) for body, summary in zip(bodies, summaries) if body['name'].startswith("plate")]
+
+
+def ribs(analysed):
+    bodies, _, summaries = analysed
+    return [(body, summary) for body, summary in zip(bodies, summaries) if body['name'].startswith("rib")]
+
+
+def test_plate_median_matches_thickness(analysed):
+    for body, summary in plates(analysed):
+        assert summary['median'] == pytest.approx(body['expected'], rel=0.02)
+
+
+def test_ribs_are_non_uniform(analysed):
+    assert plates(analysed) and ribs(analysed)
+    assert not any(summary['non_uniform'] for _, summary in plates(analysed))
+    assert all(summary['non_uniform'] for _, summary in ribs(analysed))
+
+
+def test_recommended_range_brackets_plate_thickness(analysed):
+    for body, summary in plates(analysed):
+        assert summary['recommended_min'] < body['expected'] < summary['recommended_max']
+
+    range_min, range_max = mesh_thickness.overall_range(analysed[2])
+    assert range_min < min(body['expected'] for body, _ in plates(analysed))
+    assert range_max > max(body['expected'] for body, _ in plates(analysed))
+
+
+def test_pool_matches_serial(analysed, tmp_path):
+    _, meshes, serial = analysed
+    # Files and arrays take different paths into the pool
+    path = str(tmp_path / "body0.stl")
+    mesh_bvh.write_stl(path, meshes[0])
+
+    pooled = mesh_thickness.analyze_bodies([path] + meshes[1:], processes=2)
+    assert len(pooled) == len(serial)
+    for a, b in zip(pooled, serial):
+        assert a.keys() == b.keys()
+        for key in a:
+            assert a[key] == pytest.approx(b[key], rel=1e-6)
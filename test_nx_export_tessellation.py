@@ -0,0 +1,132 @@
+"""
+Tests of the tessellation export bookkeeping against a fake NX backend: the
+components, bodies and STL writer are stand-ins, so they run without NX.
+"""
+import json
+import sys
+import types
+
+import numpy as np
+import pytest
+
+sys.modules.setdefault('NXOpen', types.ModuleType('NXOpen'))
+
+import mesh_bvh
+import nx_export_tessellation
+
+
+class FakeBody:
+    def __init__(self, name, fail=False):
+        self.name = name
+        self.fail = fail
+
+
+class FakeComponent:
+    """
+    Component instance whose bodies are unit boxes at placed, while its
+    component transform reports origin (placed unless given otherwise)
+    """
+
+    def __init__(self, key, prototype, bodies, origin=(0.0, 0.0, 0.0), placed=None):
+        self.key = key
+        self.Prototype = types.SimpleNamespace(FullPath=prototype)
+        self.bodies = bodies
+        self.origin = np.array(origin, dtype=np.float64)
+        self.placed = self.origin if placed is None else np.array(placed, dtype=np.float64)
+
+    def FindOccurrence(self, body):
+        return types.SimpleNamespace(component=self, body=body)
+
+
+def fake_export_body_stl(theSession, occ_body, output_path):
+    if occ_body.body.fail:
+        raise RuntimeError("STL creator failed")
+    mesh_bvh.write_stl(output_path, mesh_bvh.box_mesh(center=occ_body.component.placed))
+
+
+def fake_body_bounding_box(theUfSession, occ_body):
+    center = occ_body.component.placed
+    return list(center - 0.5) + list(center + 0.5)
+
+
+@pytest.fixture
+def export(tmp_path, monkeypatch):
+    """Run export_tessellation on components, returns the manifest"""
+    uf = types.ModuleType('NXOpen.UF')
+    uf.UFSession = types.SimpleNamespace(GetUFSession=lambda: None)
+    monkeypatch.setitem(sys.modules, 'NXOpen.UF', uf)
+    monkeypatch.setattr(sys.modules['NXOpen'], 'UF', uf, raising=False)
+    monkeypatch.setattr(nx_export_tessellation, 'get_body_bounding_box', fake_body_bounding_box)
+    monkeypatch.setattr(nx_export_tessellation, 'get_component_bodies', lambda comp: comp.bodies)
+    monkeypatch.setattr(nx_export_tessellation, 'get_component_key', lambda comp: comp.key)
+    monkeypatch.setattr(nx_export_tessellation, 'get_component_name', lambda comp: comp.key)
+    monkeypatch.setattr(nx_export_tessellation, 'component_transform', lambda comp: (np.eye(3), comp.origin))
+    monkeypatch.setattr(nx_export_tessellation, 'export_body_stl', fake_export_body_stl)
+
+    def run(components):
+        monkeypatch.setattr(nx_export_tessellation, 'get_all_components', lambda workPart: components)
+        work_part = types.SimpleNamespace(FullPath=str(tmp_path / "asm.prt"))
+        lw = types.SimpleNamespace(WriteLine=lambda text: None)
+        manifest_path = nx_export_tessellation.export_tessellation(None, work_part, str(tmp_path), lw)
+        with open(manifest_path, 'r') as f:
+            return json.load(f)
+
+    return run
+
+
+def test_failed_body_export_marks_instance_incomplete(export, tmp_path):
+    broken = FakeBody("rib", fail=True)
+    manifest = export([
+        FakeComponent("A", "plate.prt", [FakeBody("plate")]),
+        FakeComponent("B", "bracket.prt", [FakeBody("web"), broken], origin=(5.0, 0.0, 0.0)),
+        FakeComponent("C", "bracket.prt", [FakeBody("web"), broken], origin=(10.0, 0.0, 0.0)),
+    ])
+
+    assert manifest['incomplete'] == ["B", "C"]
+    assert [instance['key'] for instance in manifest['instances']] == ["A"]
+    # Only the two bodies that exported have a mesh, and their files exist
+    assert len(manifest['meshes']) == 2
+    for file_name in manifest['meshes'].values():
+        assert (tmp_path / file_name).exists()
+
+
+def test_repeated_instances_share_the_prototype_mesh(export):
+    manifest = export([
+        FakeComponent("A", "plate.prt", [FakeBody("plate")]),
+        FakeComponent("B", "plate.prt", [FakeBody("plate")], origin=(0.0, 3.0, 0.0)),
+    ])
+
+    assert manifest['incomplete'] == []
+    first, second = manifest['instances']
+    assert first['meshes'] == second['meshes'] and len(manifest['meshes']) == 1
+    assert second['placements'][0]['origin'] == [0.0, 3.0, 0.0]
+
+
+def test_misplaced_instance_gets_its_own_mesh(export, tmp_path):
+    # B reports the transform of A, so the shared mesh would land on A
+    manifest = export([
+        FakeComponent("A", "plate.prt", [FakeBody("plate")]),
+        FakeComponent("B", "plate.prt", [FakeBody("plate")], placed=(0.0, 3.0, 0.0)),
+    ])
+
+    assert manifest['incomplete'] == []
+    first, second = manifest['instances']
+    assert first['meshes'] != second['meshes'] and len(manifest['meshes']) == 2
+    assert second['placements'][0]['origin'] == [0.0, 0.0, 0.0]
+    triangles = mesh_bvh.read_stl(str(tmp_path / manifest['meshes'][second['meshes'][0]]))
+    assert np.allclose(triangles.reshape(-1, 3).mean(axis=0), [0.0, 3.0, 0.0])
+
+
+def test_mesh_not_matching_its_body_marks_instance_incomplete(export, monkeypatch):
+    def shifted_box(theUfSession, occ_body):
+        box = fake_body_bounding_box(theUfSession, occ_body)
+        return box if occ_body.component.key != "B" else [value + 1.0 for value in box]
+
+    monkeypatch.setattr(nx_export_tessellation, 'get_body_bounding_box', shifted_box)
+    manifest = export([
+        FakeComponent("A", "plate.prt", [FakeBody("plate")]),
+        FakeComponent("B", "bracket.prt", [FakeBody("web")], origin=(5.0, 0.0, 0.0)),
+    ])
+
+    assert manifest['incomplete'] == ["B"]
+    assert [instance['key'] for instance in manifest['instances']] == ["A"]
@@ -0,0 +1,172 @@
+"""
+Tests of the nx_worker protocol and scheduler against a fake session backend,
+so they run without NX.
+"""
+import json
+import queue
+import socket
+import threading
+import types
+
+import pytest
+
+import nx_worker
+
+
+class FakeBackend:
+    """Session backend that records part loads and returns canned job results"""
+
+    def __init__(self):
+        self.opened = []
+        self.closed = []
+        self.runs = []
+
+    def open_part(self, path):
+        self.opened.append(path)
+        return f"part:{path}"
+
+    def close_part(self, part):
+        self.closed.append(part)
+
+    def run(self, job, part):
+        self.runs.append((job['job'], part, job.get('options', {})))
+        if part.endswith('broken.prt'):
+            raise RuntimeError("cannot analyse")
+        return f"{job['job']} done on {part}"
+
+
+@pytest.fixture
+def worker():
+    """Running job server and scheduler on a free local port"""
+    backend = FakeBackend()
+    jobs = queue.Queue()
+    cache = nx_worker.PartCache(backend, max_parts=2)
+    server = nx_worker.JobServer(('127.0.0.1', 0), jobs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    scheduler = threading.Thread(target=nx_worker.process_jobs, args=(cache, jobs, lambda text: None), daemon=True)
+    scheduler.start()
+
+    yield types.SimpleNamespace(backend=backend, cache=cache, port=server.server_address[1], scheduler=scheduler)
+
+    if scheduler.is_alive():
+        nx_worker.submit([{'job': 'shutdown'}], port=server.server_address[1], timeout=5)
+        scheduler.join(5)
+    server.shutdown()
+    server.server_close()
+
+
+def send_lines(port, lines):
+    """Send raw request lines over one connection, returns the decoded responses"""
+    responses = []
+    with socket.create_connection(('127.0.0.1', port), timeout=5) as sock:
+        stream = sock.makefile('rwb')
+        for line in lines:
+            stream.write(line.encode('utf-8') + b"\n")
+            stream.flush()
+            responses.append(json.loads(stream.readline().decode('utf-8')))
+    return responses
+
+
+def test_submit_round_trip(worker):
+    responses = nx_worker.submit([
+        {'job': 'ping'},
+        {'job': 'touch', 'part': 'asm1.prt', 'options': {'clearance': 0.5}},
+        {'job': 'faces', 'part': 'asm1.prt'},
+    ], port=worker.port, timeout=5)
+
+    assert [r['ok'] for r in responses] == [True, True, True]
+    assert responses[0]['result'] == {'open_parts': 0}
+    assert responses[1]['result'] == "touch done on part:asm1.prt"
+    assert worker.backend.runs[0][2] == {'clearance': 0.5}
+    # The second job on the same part reuses the loaded part
+    assert len(worker.backend.opened) == 1
+
+
+def test_failing_job_keeps_worker_running(worker):
+    failed, pinged = nx_worker.submit([{'job': 'touch', 'part': 'broken.prt'}, {'job': 'ping'}],
+                                      port=worker.port, timeout=5)
+    assert not failed['ok'] and "cannot analyse" in failed['error']
+    assert pinged['ok']
+
+
+def test_lru_eviction_order():
+    backend = FakeBackend()
+    cache = nx_worker.PartCache(backend, max_parts=2)
+
+    cache.get('a.prt')
+    cache.get('b.prt')
+    cache.get('a.prt')
+    cache.get('c.prt')
+    assert backend.closed == ["part:b.prt"]
+
+    cache.get('d.prt')
+    assert backend.closed == ["part:b.prt", "part:a.prt"]
+    assert 'c.prt' in cache and 'd.prt' in cache and len(cache) == 2
+
+    cache.clear()
+    assert backend.closed[2:] == ["part:c.prt", "part:d.prt"]
+
+
+def test_module_options_restore():
+    module = types.SimpleNamespace(__name__='journal', clearance=None, time_budget=60, main=print)
+    allowed = nx_worker.JOB_OPTIONS['touch']
+
+    with nx_worker.module_options(module, {'clearance': 0.5, 'time_budget': 5}, allowed):
+        assert module.clearance == 0.5 and module.time_budget == 5
+    assert module.clearance is None and module.time_budget == 60
+
+    with pytest.raises(RuntimeError):
+        with nx_worker.module_options(module, {'clearance': 1.0}, allowed):
+            raise RuntimeError("job failed")
+    assert module.clearance is None
+
+    with pytest.raises(ValueError):
+        with nx_worker.module_options(module, {'clearance': 2.0, 'unknown': 1}, allowed):
+            pass
+    assert module.clearance is None
+
+    # Existing module attributes outside the allow-list cannot be replaced
+    with pytest.raises(ValueError):
+        with nx_worker.module_options(module, {'main': None}, allowed):
+            pass
+    assert module.main is print
+
+
+def test_shutdown_closes_parts(worker):
+    nx_worker.submit([{'job': 'touch', 'part': 'a.prt'}], port=worker.port, timeout=5)
+    response, = nx_worker.submit([{'job': 'shutdown'}], port=worker.port, timeout=5)
+
+    worker.scheduler.join(5)
+    assert response == {'ok': True, 'result': 'shutdown'}
+    assert not worker.scheduler.is_alive()
+    assert worker.backend.closed == ["part:a.prt"]
+
+
+def test_malformed_requests(worker):
+    responses = send_lines(worker.port, [
+        "not json",
+        "[1, 2]",
+        '"touch"',
+        '{"job": "explode", "part": "a.prt"}',
+        '{"job": "touch"}',
+        '{"job": "faces", "part": "a.prt", "options": [1]}',
+        '{"job": "touch", "part": "a.prt", "options": {"main": null}}',
+        '{"job": "faces", "part": "a.prt", "options": {"clearance": 0.5}}',
+        '{"job": "ping", "options": {"time_budget": 5}}',
+        '{"job": "ping"}',
+    ])
+
+    assert [r['ok'] for r in responses] == [False] * 9 + [True]
+    assert all(r['error'].startswith("Invalid request") for r in responses[:9])
+    assert worker.scheduler.is_alive()
+    assert worker.backend.opened == []
+
+
+def test_unknown_job_does_not_touch_cache():
+    backend = FakeBackend()
+    cache = nx_worker.PartCache(backend, max_parts=1)
+    cache.get('a.prt')
+
+    response = nx_worker.run_job(cache, {'job': 'explode', 'part': 'b.prt'})
+    assert not response['ok']
+    assert backend.opened == ['a.prt'] and backend.closed == []